@@ -0,0 +1,15 @@
+from common.cache import SQLiteLRUCache, without_cache
+from common.pages import PagePruner, rank_abstract_candidates
+from common.page_cache import PageCache, PageCacheStats
+from common.parsing import ParsedPDF, parse_pdfs
+
+__all__ = [
+    "PageCache",
+    "PageCacheStats",
+    "PagePruner",
+    "ParsedPDF",
+    "SQLiteLRUCache",
+    "parse_pdfs",
+    "rank_abstract_candidates",
+    "without_cache",
+]
@@ -0,0 +1,236 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from pathlib import Path
+from typing import Any
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+
+class SQLiteLRUCache(BaseCache):
+    def __init__(self, db_path: Path, max_entries: int = 100_000) -> None:
+        """
+        Initializes the LLM response cache.
+        Responses are keyed by a hash of the rendered prompt and the LLM string,
+        which holds the model identity and generation params.
+        The least recently used responses are evicted past `max_entries`.
+
+        Args:
+            db_path: The path to the SQLite database.
+            max_entries: The maximum number of cached responses.
+
+        Returns:
+            None
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)"
+        )
+        self.connection.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """
+        Looks up the cached response of the prompt.
+        Responses stored in an older format count as misses and are overwritten.
+
+        Args:
+            prompt: The rendered prompt.
+            llm_string: The string representation of the LLM and its params.
+
+        Returns:
+            (RETURN_VAL_TYPE | None): The cached generations or None on a miss.
+        """
+        key = make_cache_key(prompt, llm_string)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM llm_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            generations = load_generations(row[0]) if row is not None else None
+            if generations is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.connection.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self.connection.commit()
+
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """
+        Caches the response of the prompt and evicts the least recently used responses.
+
+        Args:
+            prompt: The rendered prompt.
+            llm_string: The string representation of the LLM and its params.
+            return_val: The generations to cache.
+
+        Returns:
+            None
+        """
+        key = make_cache_key(prompt, llm_string)
+        value = dump_generations(return_val)
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self.connection.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache
+                    ORDER BY accessed_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self.connection.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """
+        Clears the cache.
+
+        Args:
+            kwargs: Unused.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM llm_cache")
+            self.connection.commit()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the hit and miss counters and the number of cached responses.
+
+        Args:
+            None
+
+        Returns:
+            (dict[str, int]): The cache statistics.
+        """
+        with self.lock:
+            (entries,) = self.connection.execute(
+                "SELECT COUNT(*) FROM llm_cache"
+            ).fetchone()
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+        }
+
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Returns the cache key of the prompt and LLM.
+
+    Args:
+        prompt: The rendered prompt.
+        llm_string: The string representation of the LLM and its params.
+
+    Returns:
+        (str): The hex digest.
+    """
+    return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+
+def dump_generations(generations: RETURN_VAL_TYPE) -> str:
+    """
+    Serializes the generations as plain JSON.
+
+    Args:
+        generations: The generations.
+
+    Returns:
+        (str): The JSON.
+    """
+    return json.dumps(
+        [
+            {
+                "text": generation.text,
+                "generation_info": generation.generation_info,
+                "message": (
+                    message_to_dict(generation.message)
+                    if isinstance(generation, ChatGeneration)
+                    else None
+                ),
+            }
+            for generation in generations
+        ],
+        default=str,
+    )
+
+
+def load_generations(value: str) -> list[Generation] | None:
+    """
+    Rebuilds the generations serialized by `dump_generations`.
+
+    Args:
+        value: The JSON.
+
+    Returns:
+        (list[Generation] | None): The generations, or None if the value is in another format.
+    """
+    try:
+        return [
+            (
+                ChatGeneration(
+                    message=messages_from_dict([entry["message"]])[0],
+                    generation_info=entry["generation_info"],
+                )
+                if entry["message"] is not None
+                else Generation(text=entry["text"], generation_info=entry["generation_info"])
+            )
+            for entry in json.loads(value)
+        ]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def without_cache(llm: BaseChatModel) -> BaseChatModel:
+    """
+    Returns a copy of the LLM that never reads nor writes any cache.
+    An LLM wrapping another one, such as a governed LLM, is copied with the
+    wrapped LLM uncached as well, since that is the one whose cache answers.
+
+    Args:
+        llm: The LLM.
+
+    Returns:
+        (BaseChatModel): The uncached LLM.
+    """
+    wrapped = getattr(llm, "llm", None)
+    if isinstance(wrapped, BaseChatModel):
+        return llm.model_copy(update={"llm": without_cache(wrapped), "cache": False})
+
+    return llm.model_copy(update={"cache": False})
@@ -0,0 +1,229 @@
+import os
+import json
+import zlib
+import hashlib
+import tempfile
+import threading
+
+from pathlib import Path
+from typing import NamedTuple
+
+from langchain_core.documents.base import Document
+from langchain_community.document_loaders import PyPDFLoader
+
+
+CACHE_SUFFIX = ".json.z"
+
+
+class PageCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+
+
+class PageCache:
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 1 << 30,
+        use_content_hash: bool = False,
+    ) -> None:
+        """
+        Initializes the parsed page cache.
+        The pages of a PDF are stored as zlib-compressed JSON keyed by the path,
+        size and modification time of the file, and optionally by its content hash.
+        Entries are written atomically so concurrent readers never see partial files,
+        and the least recently used entries are evicted past `max_bytes`.
+
+        Args:
+            root: The directory of the cache.
+            max_bytes: The maximum size of the cache on disk.
+            use_content_hash: Whether to also key the entries by the hash of the file content.
+
+        Returns:
+            None
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.use_content_hash = use_content_hash
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = sum(entry.stat().st_size for entry in self.entries())
+
+    def load(self, path: Path) -> list[Document]:
+        """
+        Loads the pages of the PDF from the cache, or parses and caches them.
+
+        Args:
+            path: The path to the PDF.
+
+        Returns:
+            (list[Document]): The pages.
+        """
+        pages = self.get(path)
+        if pages is None:
+            pages = [
+                (page.page_content, page.metadata)
+                for page in PyPDFLoader(str(path)).load()
+            ]
+            self.put(path, pages)
+
+        return [
+            Document(page_content=content, metadata=metadata)
+            for content, metadata in pages
+        ]
+
+    def get(self, path: Path) -> list[tuple[str, dict]] | None:
+        """
+        Returns the cached pages of the PDF.
+
+        Args:
+            path: The path to the PDF.
+
+        Returns:
+            (list[tuple[str, dict]] | None): The text and metadata of each page,
+                or None if the file is not cached.
+        """
+        try:
+            entry_path = self.entry_path(path)
+            with entry_path.open("rb") as file:
+                pages = json.loads(zlib.decompress(file.read()))
+            os.utime(entry_path)
+        except (OSError, zlib.error, json.JSONDecodeError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+
+        return [(content, metadata) for content, metadata in pages]
+
+    def put(self, path: Path, pages: list[tuple[str, dict]]) -> None:
+        """
+        Caches the pages of the PDF and evicts old entries if the cache is full.
+
+        Args:
+            path: The path to the PDF.
+            pages: The text and metadata of each page.
+
+        Returns:
+            None
+        """
+        entry_path = self.entry_path(path)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        data = zlib.compress(json.dumps(pages, default=str).encode())
+
+        fd, tmp_path = tempfile.mkstemp(dir=entry_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, entry_path)
+
+        with self.lock:
+            self.size_bytes += len(data)
+            if self.size_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> None:
+        """
+        Deletes the least recently used entries until the cache
+        is below 90% of its maximum size.
+        Must be called while holding the lock.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        entries = []
+        for entry in self.entries():
+            try:
+                entries.append((entry.stat(), entry))
+            except FileNotFoundError:
+                continue
+
+        entries.sort(key=lambda item: item[0].st_mtime)
+        self.size_bytes = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in entries:
+            if self.size_bytes <= self.max_bytes * 0.9:
+                break
+
+            entry.unlink(missing_ok=True)
+            self.size_bytes -= stat.st_size
+
+    def entries(self) -> list[Path]:
+        """
+        Returns the paths of the cache entries.
+
+        Args:
+            None
+
+        Returns:
+            (list[Path]): The entry paths.
+        """
+        return list(self.root.glob(f"*/*{CACHE_SUFFIX}"))
+
+    def entry_path(self, path: Path) -> Path:
+        """
+        Returns the path of the cache entry of the PDF.
+
+        Args:
+            path: The path to the PDF.
+
+        Returns:
+            (Path): The entry path.
+        """
+        stat = path.stat()
+        hasher = hashlib.sha256(
+            f"{path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}".encode()
+        )
+        if self.use_content_hash:
+            hasher.update(hashlib.sha256(path.read_bytes()).digest())
+
+        digest = hasher.hexdigest()
+        return self.root / digest[:2] / f"{digest}{CACHE_SUFFIX}"
+
+    def stats(self) -> PageCacheStats:
+        """
+        Returns the statistics of the cache.
+
+        Args:
+            None
+
+        Returns:
+            (PageCacheStats): The hits and misses of this process and the entries on disk.
+        """
+        sizes = []
+        for entry in self.entries():
+            try:
+                sizes.append(entry.stat().st_size)
+            except FileNotFoundError:
+                continue
+
+        return PageCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            entries=len(sizes),
+            size_bytes=sum(sizes),
+        )
+
+    def report(self) -> str:
+        """
+        Returns a short report of the cache statistics.
+
+        Args:
+            None
+
+        Returns:
+            (str): The report.
+        """
+        stats = self.stats()
+        return (
+            f"Page cache: {stats.hits} hits, {stats.misses} misses, "
+            f"{stats.entries} entries, {stats.size_bytes / (1 << 20):.1f} MiB."
+        )
@@ -0,0 +1,263 @@
+import re
+import math
+
+from langchain_core.documents.base import Document
+
+
+REFERENCES_HEADING = re.compile(
+    r"^\s*(\d+\.?\s*)?(references|bibliography|works cited|literature cited)\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+ACKNOWLEDGEMENTS_HEADING = re.compile(
+    r"^\s*(\d+\.?\s*)?acknowledge?ments?\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+APPENDIX_HEADING = re.compile(
+    r"^\s*(appendix|appendices|supplementary material)\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+ABSTRACT_HEADING = re.compile(
+    r"^\s*(abstract|summary)\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+CITATION_LINE = re.compile(
+    r"""
+    ^\s*\[\d+\]                             # [12] Author ...
+    | ^\s*\d+\.\s+[A-Z][\w'-]+,             # 12. Author, ...
+    | ^\s*[A-Z][\w'-]+,\s+(?:[A-Z]\.\s?)+   # Author, A. B.
+    | \bet\s+al\.                           # ... et al.
+    | \bdoi:|\bdoi\.org/|\barxiv:           # identifiers
+    | \bpp\.\s*\d+|\bvol\.\s*\d+            # page and volume ranges
+    | \(?(?:19|20)\d{2}[a-z]?\)?\.\s*$      # line ending in a year
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+CONTENT = "content"
+REFERENCES = "references"
+ACKNOWLEDGEMENTS = "acknowledgements"
+APPENDIX = "appendix"
+
+
+class PagePruner:
+    def __init__(
+        self,
+        drop_kinds: frozenset[str] = frozenset({REFERENCES, ACKNOWLEDGEMENTS}),
+        citation_density: float = 0.4,
+        protected_fraction: float = 0.5,
+    ) -> None:
+        """
+        Initializes the page pruner.
+        The pruner classifies pages with local heuristics only, no LLM calls are made.
+
+        Args:
+            drop_kinds: The kinds of pages to drop.
+            citation_density: The share of citation-like lines above which a page is a reference list.
+            protected_fraction: The leading share of the document whose pages are never dropped.
+
+        Returns:
+            None
+        """
+        self.drop_kinds = drop_kinds
+        self.citation_density = citation_density
+        self.protected_fraction = protected_fraction
+
+        self.pages_seen = 0
+        self.pages_dropped = 0
+        self.chars_dropped = 0
+
+    def __call__(self, pages: list[Document]) -> list[Document]:
+        """
+        Drops the pages that carry no information for the LLM
+        and records how many pages were dropped.
+
+        Args:
+            pages: The pages of a document.
+
+        Returns:
+            (list[Document]): The kept pages.
+        """
+        kept = self.select(pages)
+        kept_ids = {id(page) for page in kept}
+        dropped = [page for page in pages if id(page) not in kept_ids]
+
+        self.pages_seen += len(pages)
+        self.pages_dropped += len(dropped)
+        self.chars_dropped += sum(len(page.page_content) for page in dropped)
+
+        return kept
+
+    def select(self, pages: list[Document]) -> list[Document]:
+        """
+        Returns the pages to keep without recording any statistics.
+        Every page is tagged with its kind in the `page_kind` metadata.
+
+        Args:
+            pages: The pages of a document.
+
+        Returns:
+            (list[Document]): The kept pages.
+        """
+        kinds = self.classify_pages(pages)
+        for page, kind in zip(pages, kinds):
+            page.metadata["page_kind"] = kind
+
+        kept = [page for page, kind in zip(pages, kinds) if kind not in self.drop_kinds]
+        if not kept:
+            return pages
+
+        return kept
+
+    def classify_pages(self, pages: list[Document]) -> list[str]:
+        """
+        Classifies the pages of a document.
+        Appendix pages carry their kind over to the following pages.
+
+        Args:
+            pages: The pages of a document.
+
+        Returns:
+            (list[str]): The kind of each page.
+        """
+        first_unprotected = math.ceil(len(pages) * self.protected_fraction)
+        kinds = []
+        in_appendix = False
+        for idx, page in enumerate(pages):
+            if idx < first_unprotected:
+                kinds.append(CONTENT)
+                continue
+
+            kind = self.classify_page(page.page_content)
+            if kind == APPENDIX:
+                in_appendix = True
+            elif kind == CONTENT and in_appendix:
+                kind = APPENDIX
+
+            kinds.append(kind)
+
+        return kinds
+
+    def classify_page(self, text: str) -> str:
+        """
+        Classifies a single page from the back part of a document.
+
+        Args:
+            text: The text of the page.
+
+        Returns:
+            (str): The kind of the page.
+        """
+        if citation_density(text) >= self.citation_density:
+            return REFERENCES
+
+        head = text[:200]
+        if ACKNOWLEDGEMENTS_HEADING.search(head) and len(text) < 2000:
+            return ACKNOWLEDGEMENTS
+        if APPENDIX_HEADING.search(head):
+            return APPENDIX
+
+        heading = REFERENCES_HEADING.search(text)
+        if heading is not None and len(text[: heading.start()].strip()) < 200:
+            return REFERENCES
+
+        return CONTENT
+
+    def saved_calls(self, chars_per_call: int | None = None) -> int:
+        """
+        Returns the number of LLM calls saved by the dropped pages.
+
+        Args:
+            chars_per_call: The characters sent in one call when chunks span pages, or None
+                when pages are chunked one by one and every dropped page saves a call.
+
+        Returns:
+            (int): The number of saved calls.
+        """
+        if chars_per_call is None:
+            return self.pages_dropped
+
+        return self.chars_dropped // chars_per_call
+
+    def report(self, chars_per_call: int | None = None) -> str:
+        """
+        Returns a short report of the pruning.
+
+        Args:
+            chars_per_call: The characters sent in one call when chunks span pages, or None
+                when pages are chunked one by one and every dropped page saves a call.
+
+        Returns:
+            (str): The report.
+        """
+        return (
+            f"Pruned {self.pages_dropped}/{self.pages_seen} pages, "
+            f"saved about {self.saved_calls(chars_per_call)} LLM calls."
+        )
+
+
+def citation_density(text: str) -> float:
+    """
+    Returns the share of non-empty lines that look like bibliography entries.
+
+    Args:
+        text: The text of the page.
+
+    Returns:
+        (float): The citation density.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return 0.0
+
+    citations = sum(1 for line in lines if CITATION_LINE.search(line))
+    return citations / len(lines)
+
+
+def rank_abstract_candidates(pages: list[Document], top_k: int = 2) -> list[int]:
+    """
+    Ranks the pages by how likely they hold the abstract, using local heuristics only:
+    an "Abstract" heading, the position of the page and the shape of its paragraphs.
+
+    Args:
+        pages: The pages of a document.
+        top_k: The number of candidates to return.
+
+    Returns:
+        (list[int]): The indices of the most likely pages, most likely first.
+    """
+    scores = [
+        (abstract_score(page.page_content, idx), idx) for idx, page in enumerate(pages)
+    ]
+    ranked = sorted(
+        (item for item in scores if item[0] > 0),
+        key=lambda item: (-item[0], item[1]),
+    )
+
+    return [idx for _, idx in ranked[:top_k]]
+
+
+def abstract_score(text: str, page_index: int) -> float:
+    """
+    Scores how likely the page holds the abstract.
+
+    Args:
+        text: The text of the page.
+        page_index: The index of the page in the document.
+
+    Returns:
+        (float): The score, zero or less for unlikely pages.
+    """
+    score = max(3.0 - page_index, 0.0)
+    if ABSTRACT_HEADING.search(text):
+        score += 5.0
+    elif "abstract" in text[:3000].casefold():
+        score += 2.0
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    if lines:
+        prose_lines = sum(1 for line in lines if len(line.split()) >= 6)
+        score += 2.0 * prose_lines / len(lines)
+
+    score -= 5.0 * citation_density(text)
+
+    return score
@@ -0,0 +1,234 @@
+import os
+import signal
+
+from pathlib import Path
+from typing import NamedTuple
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from langchain_core.documents.base import Document
+from langchain_community.document_loaders import PyPDFLoader
+
+from common.page_cache import PageCache
+
+
+class ParsedPDF(NamedTuple):
+    path: Path
+    pages: list[Document]
+    error: Exception | None
+
+
+def parse_pdfs(
+    paths: Iterable[Path],
+    max_workers: int | None = None,
+    files_per_task: int = 4,
+    timeout: float | None = 120,
+    page_cache: PageCache | None = None,
+) -> Iterator[ParsedPDF]:
+    """
+    Parses the PDFs in a process pool and yields them in the order of the paths.
+    Files are sent to the workers in tasks of `files_per_task` files and at most
+    `max_workers * 2` tasks are pending at a time. A file that fails or times out
+    is yielded with its error instead of stopping the run.
+    Files found in the page cache are never sent to the workers, and parsed files
+    are added to it.
+
+    Args:
+        paths: The paths to the PDFs.
+        max_workers: The number of worker processes, the number of CPUs by default.
+        files_per_task: The number of files parsed by one task.
+        timeout: The maximum number of seconds spent parsing one file, if any.
+        page_cache: The cache of parsed pages, if any.
+
+    Returns:
+        (Iterator[ParsedPDF]): The parsed PDFs.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending: deque[tuple[list[Path], Future, PageCache | None]] = deque()
+        for task_paths, cached in make_tasks(paths, files_per_task, page_cache):
+            if cached is not None:
+                future = Future()
+                future.set_result([(cached, None)])
+                pending.append((task_paths, future, None))
+            else:
+                pending.append(
+                    (task_paths, submit_task(executor, task_paths, timeout), page_cache)
+                )
+
+            if len(pending) >= 2 * max_workers:
+                yield from collect_task(*pending.popleft())
+
+        while pending:
+            yield from collect_task(*pending.popleft())
+
+
+def make_tasks(
+    paths: Iterable[Path],
+    files_per_task: int,
+    page_cache: PageCache | None = None,
+) -> Iterator[tuple[list[Path], list[tuple[str, dict]] | None]]:
+    """
+    Groups the paths into tasks.
+    A cached file becomes a task of its own carrying its cached pages, and the
+    files before it are flushed as a shorter task to keep the order of the paths.
+
+    Args:
+        paths: The paths to the PDFs.
+        files_per_task: The number of files in one task.
+        page_cache: The cache of parsed pages, if any.
+
+    Returns:
+        (Iterator[tuple[list[Path], list[tuple[str, dict]] | None]]): The paths of each
+            task and the cached pages, or None if the task has to be parsed.
+    """
+    task: list[Path] = []
+    for path in paths:
+        cached = page_cache.get(path) if page_cache is not None else None
+        if cached is not None:
+            if task:
+                yield task, None
+                task = []
+            yield [path], cached
+            continue
+
+        task.append(path)
+        if len(task) == files_per_task:
+            yield task, None
+            task = []
+
+    if task:
+        yield task, None
+
+
+def submit_task(
+    executor: ProcessPoolExecutor,
+    task_paths: list[Path],
+    timeout: float | None,
+) -> Future:
+    """
+    Submits the task to the pool.
+    A broken pool fails the task instead of stopping the run.
+
+    Args:
+        executor: The process pool.
+        task_paths: The paths parsed by the task.
+        timeout: The maximum number of seconds spent parsing one file, if any.
+
+    Returns:
+        (Future): The future of the task.
+    """
+    try:
+        return executor.submit(
+            parse_pdf_task,
+            [str(path) for path in task_paths],
+            timeout,
+        )
+    except BrokenProcessPool as error:
+        future = Future()
+        future.set_exception(error)
+        return future
+
+
+def collect_task(
+    task_paths: list[Path],
+    future: Future,
+    page_cache: PageCache | None = None,
+) -> Iterator[ParsedPDF]:
+    """
+    Waits for the task and turns its results back into documents.
+
+    Args:
+        task_paths: The paths parsed by the task.
+        future: The future of the task.
+        page_cache: The cache the parsed pages are added to, if any.
+
+    Returns:
+        (Iterator[ParsedPDF]): The parsed PDFs of the task.
+    """
+    try:
+        results = future.result()
+    except Exception as error:
+        for path in task_paths:
+            yield ParsedPDF(path=path, pages=[], error=error)
+        return
+
+    for path, (pages, error) in zip(task_paths, results):
+        if error is not None:
+            yield ParsedPDF(path=path, pages=[], error=RuntimeError(error))
+            continue
+
+        if page_cache is not None:
+            try:
+                page_cache.put(path, pages)
+            except OSError as error:
+                print(f"Could not cache the pages of {path}: {error}")
+
+        yield ParsedPDF(
+            path=path,
+            pages=[
+                Document(page_content=content, metadata=metadata)
+                for content, metadata in pages
+            ],
+            error=None,
+        )
+
+
+def parse_pdf_task(
+    paths: list[str],
+    timeout: float | None,
+) -> list[tuple[list[tuple[str, dict]], str | None]]:
+    """
+    Parses the PDFs of a task inside a worker process.
+    Pages are returned as plain (text, metadata) tuples, which are cheaper to
+    send back to the parent process than documents.
+
+    Args:
+        paths: The paths to the PDFs.
+        timeout: The maximum number of seconds spent parsing one file, if any.
+
+    Returns:
+        (list[tuple[list[tuple[str, dict]], str | None]]): The pages and error of each file.
+    """
+    results = []
+    for path in paths:
+        try:
+            with time_limit(timeout):
+                pages = PyPDFLoader(path).load()
+            results.append(
+                ([(page.page_content, page.metadata) for page in pages], None)
+            )
+        except Exception as error:
+            results.append(([], f"{type(error).__name__}: {error}"))
+
+    return results
+
+
+@contextmanager
+def time_limit(timeout: float | None) -> Iterator[None]:
+    """
+    Limits the time spent in the block, using SIGALRM where it is available.
+
+    Args:
+        timeout: The maximum number of seconds, or None for no limit.
+
+    Returns:
+        (Iterator[None]): The limited context.
+    """
+    if timeout is None or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def raise_timeout(signum, frame) -> None:
+        raise TimeoutError(f"Parsing took more than {timeout} seconds.")
+
+    previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
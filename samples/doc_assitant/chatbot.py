@@ -10,6 +10,10 @@ from langchain_core.embeddings.embeddings import Embeddings
 from langchain_core.documents.base import Document
 from langchain_chroma import Chroma
 
+from common.cache import without_cache
+from common.pages import PagePruner
+from common.page_cache import PageCache
+
 from doc_assitant.history import MessageHistoryStore, make_history_config
 from doc_assitant.utils import DocumentPages, load_pdf_documents
 from doc_assitant.prompts import user_chat_prompt, summarize_prompt, answer_prompt
@@ -22,6 +26,8 @@ class Chatbot:
         embeddings: Embeddings,
         documents_path: Path,
         max_retrives_for_search=10,
+        use_cache: bool = True,
+        page_cache: PageCache | None = None,
     ) -> None:
         """
         Initializes the chatbot.
@@ -31,6 +37,8 @@ class Chatbot:
             embeddings: The embeddings to use.
             documents_path: The path to the documents.
             max_retrives_for_search: The maximum number of retrives for search.
+            use_cache: Whether the summarize and answer chains may use the LLM response cache.
+            page_cache: The cache of parsed pages, if any.
 
         Returns:
             None
@@ -39,6 +47,9 @@ class Chatbot:
         self.embeddings = embeddings
         self.documents_path = documents_path
         self.max_retrives_for_search = max_retrives_for_search
+        self.chain_llm = self.llm if use_cache else without_cache(self.llm)
+        self.page_pruner = PagePruner()
+        self.page_cache = page_cache
 
         self.setup_chain()
         self.setup_chatbot()
@@ -54,7 +65,7 @@ class Chatbot:
         Returns:
             None
         """
-        self.chain = user_chat_prompt | self.llm | StrOutputParser()
+        self.chain = user_chat_prompt | without_cache(self.llm) | StrOutputParser()
 
     def setup_chatbot(self) -> None:
         """
@@ -85,7 +96,14 @@ class Chatbot:
         Returns:
             None
         """
-        documents = load_pdf_documents(documents_path=self.documents_path)
+        documents = load_pdf_documents(
+            documents_path=self.documents_path,
+            pruner=self.page_pruner,
+            page_cache=self.page_cache,
+        )
+        print(self.page_pruner.report())
+        if self.page_cache is not None:
+            print(self.page_cache.report())
         summaries = self.summarize_documents(documents=documents)
         vectorstore = Chroma.from_documents(summaries, embedding=self.embeddings)
 
@@ -104,7 +122,7 @@ class Chatbot:
         Returns:
             (list[Document]): The summarized documents.
         """
-        summarizer = summarize_prompt | self.llm | StrOutputParser()
+        summarizer = summarize_prompt | self.chain_llm | StrOutputParser()
 
         def summarize(doc: DocumentPages) -> Document:
             """
@@ -155,8 +173,11 @@ class Chatbot:
         Returns:
             (str): The answer.
         """
-        chain = answer_prompt | self.llm | StrOutputParser()
-        pages = PyPDFLoader(str(document_path)).load()
+        chain = answer_prompt | self.chain_llm | StrOutputParser()
+        if self.page_cache is not None:
+            pages = self.page_pruner(self.page_cache.load(document_path))
+        else:
+            pages = self.page_pruner(PyPDFLoader(str(document_path)).load())
         current_information = "No information yet."
         for page in pages:
             current_information = chain.invoke(
@@ -2,6 +2,10 @@ from pathlib import Path
 
 from langchain_community.chat_models import ChatOllama
 from langchain_community.embeddings import OllamaEmbeddings
+
+from common.cache import SQLiteLRUCache
+from common.page_cache import PageCache
+
 from doc_assitant import Runner
 
 
@@ -10,13 +14,17 @@ def main():
     The main function for the CLI.
     """
     model = input("Enter ollama model name: ")
-    llm = ChatOllama(model=model)
+    llm = ChatOllama(
+        model=model,
+        cache=SQLiteLRUCache(db_path=Path.home() / ".doc_assitant_cache.db"),
+    )
     embeddings = OllamaEmbeddings(model=model)
 
     runner = Runner(
         llm=llm,
         embeddings=embeddings,
         documents_path=Path("/home/kamal/Downloads"),
+        page_cache=PageCache(root=Path.home() / ".doc_assitant_pages"),
     )
 
     runner.run()
@@ -9,6 +9,8 @@ from pathlib import Path
 from langchain_core.embeddings.embeddings import Embeddings
 from langchain_core.language_models.chat_models import BaseChatModel
 
+from common.page_cache import PageCache
+
 from doc_assitant.chatbot import Chatbot
 
 
@@ -35,6 +37,7 @@ class Runner:
         llm: BaseChatModel,
         embeddings: Embeddings,
         documents_path: Path,
+        page_cache: PageCache | None = None,
     ) -> None:
         """
         Initializes the runner.
@@ -43,6 +46,7 @@ class Runner:
             llm: The LLM to use.
             embeddings: The embeddings to use.
             documents_path: The path to the documents.
+            page_cache: The cache of parsed pages, if any.
 
         Returns:
             None
@@ -50,6 +54,7 @@ class Runner:
         self.llm = llm
         self.embeddings = embeddings
         self.documents_path = documents_path
+        self.page_cache = page_cache
 
     def run(self) -> None:
         """
@@ -65,6 +70,7 @@ class Runner:
             llm=self.llm,
             embeddings=self.embeddings,
             documents_path=self.documents_path,
+            page_cache=self.page_cache,
         )
 
         while True:
@@ -1,25 +1,47 @@
 from pathlib import Path
 
 from langchain_core.documents.base import Document
-from langchain_community.document_loaders import PyPDFLoader
+
+from common.pages import PagePruner
+from common.page_cache import PageCache
+from common.parsing import parse_pdfs
 
 
 type DocumentPages = list[Document]
 
 
-def load_pdf_documents(documents_path: Path) -> list[DocumentPages]:
+def load_pdf_documents(
+    documents_path: Path,
+    pruner: PagePruner | None = None,
+    max_workers: int | None = None,
+    page_cache: PageCache | None = None,
+) -> list[DocumentPages]:
     """
     Loads the documents from the documents path.
+    The PDFs are parsed in a process pool and the ones that fail are skipped.
 
     Args:
         documents_path: The path to the documents.
+        pruner: The pruner dropping reference and boilerplate pages, if any.
+        max_workers: The number of processes parsing the PDFs, the number of CPUs by default.
+        page_cache: The cache of parsed pages, if any.
 
     Returns:
         (list[DocumentPages]): The list of documents pages.
     """
     docs: list[list[Document]] = []
-    for file_path in documents_path.glob("*.pdf"):
-        loader = PyPDFLoader(str(file_path))
-        docs.append(loader.load())
+    for parsed in parse_pdfs(
+        documents_path.glob("*.pdf"),
+        max_workers=max_workers,
+        page_cache=page_cache,
+    ):
+        if parsed.error is not None:
+            print(f"Error parsing {parsed.path}: {parsed.error}")
+            continue
+
+        pages = parsed.pages
+        if pruner is not None:
+            pages = pruner(pages)
+        docs.append(pages)
 
     return docs
@@ -0,0 +1,11 @@
+from paper_reader.artifacts.artifact_store import (
+    ArtifactStore,
+    artifact_version,
+    content_hash,
+)
+
+__all__ = [
+    "ArtifactStore",
+    "artifact_version",
+    "content_hash",
+]
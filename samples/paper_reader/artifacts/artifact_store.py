@@ -0,0 +1,128 @@
+import os
+import json
+import hashlib
+import tempfile
+
+from pathlib import Path
+from typing import Any
+
+from langchain_core.documents.base import Document
+from langchain_core.language_models.chat_models import BaseChatModel
+
+
+class ArtifactStore:
+    def __init__(self, root: Path) -> None:
+        """
+        Initializes the artifact store.
+        Artifacts are stored as one JSON file each under
+        `root/<content hash prefix>/<content hash>/<name>-<version>.json`.
+
+        Args:
+            root: The directory of the store.
+
+        Returns:
+            None
+        """
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def get(self, pages: list[Document], name: str, version: str) -> Any | None:
+        """
+        Returns the artifact of the pages.
+
+        Args:
+            pages: The pages the artifact was derived from.
+            name: The name of the artifact.
+            version: The version of the prompts and model that derived the artifact.
+
+        Returns:
+            (Any | None): The artifact or None if it is not stored.
+        """
+        path = self.artifact_path(pages, name, version)
+        try:
+            with path.open() as file:
+                return json.load(file)["value"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, pages: list[Document], name: str, version: str, value: Any) -> None:
+        """
+        Stores the artifact of the pages.
+        The file is written to a temporary path and moved in place so readers
+        never see a partial artifact.
+
+        Args:
+            pages: The pages the artifact was derived from.
+            name: The name of the artifact.
+            version: The version of the prompts and model that derived the artifact.
+            value: The JSON serializable artifact.
+
+        Returns:
+            None
+        """
+        path = self.artifact_path(pages, name, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump({"value": value}, file)
+        os.replace(tmp_path, path)
+
+    def artifact_path(self, pages: list[Document], name: str, version: str) -> Path:
+        """
+        Returns the path of the artifact.
+
+        Args:
+            pages: The pages the artifact was derived from.
+            name: The name of the artifact.
+            version: The version of the prompts and model that derived the artifact.
+
+        Returns:
+            (Path): The path of the artifact file.
+        """
+        digest = content_hash(pages)
+        return self.root / digest[:2] / digest / f"{name}-{version}.json"
+
+
+def content_hash(pages: list[Document]) -> str:
+    """
+    Returns the hash of the content of the pages.
+
+    Args:
+        pages: The pages to hash.
+
+    Returns:
+        (str): The hex digest.
+    """
+    hasher = hashlib.sha256()
+    for page in pages:
+        hasher.update(page.page_content.encode())
+        hasher.update(b"\0")
+
+    return hasher.hexdigest()
+
+
+def artifact_version(llm: BaseChatModel, *prompts: str, **params: Any) -> str:
+    """
+    Returns the version of an artifact derived by the LLM with the prompts and params.
+
+    Args:
+        llm: The LLM deriving the artifact.
+        prompts: The prompt templates deriving the artifact.
+        params: The other settings changing the artifact.
+
+    Returns:
+        (str): The version.
+    """
+    identity = json.dumps(
+        {
+            "llm_type": llm._llm_type,
+            "llm_params": llm._identifying_params,
+            "prompts": prompts,
+            "params": params,
+        },
+        sort_keys=True,
+        default=str,
+    )
+
+    return hashlib.sha256(identity.encode()).hexdigest()[:16]
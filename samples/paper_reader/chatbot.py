@@ -1,3 +1,5 @@
+from collections.abc import Iterator
+
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.embeddings.embeddings import Embeddings
 from langchain.chains import create_retrieval_chain
@@ -5,9 +7,11 @@ from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_chroma import Chroma
 
 from paper_reader.paper import Paper
-from paper_reader.summarize import MapReduceSummarizer
+from paper_reader.summarize import MapReduceSummarizer, SummaryEvent
 from paper_reader.keywords import KeywordsExtractor
 from paper_reader.prompts import chat_prompt
+from paper_reader.artifacts import ArtifactStore
+from paper_reader.llm import INTERACTIVE, with_priority
 
 
 class Chatbot:
@@ -17,6 +21,7 @@ class Chatbot:
         embeddings: Embeddings,
         paper: Paper,
         max_retrives_for_search=10,
+        artifact_store: ArtifactStore | None = None,
     ) -> None:
         """
         Initializes the chatbot.
@@ -26,6 +31,7 @@ class Chatbot:
             embeddings: The embeddings to use.
             documents_path: The path to the documents.
             max_retrives_for_search: The maximum number of retrives for search.
+            artifact_store: The store shared by the summarizer and keywords extractor.
 
         Returns:
             None
@@ -34,6 +40,7 @@ class Chatbot:
         self.embeddings = embeddings
         self.paper = paper
         self.max_retrives_for_search = max_retrives_for_search
+        self.artifact_store = artifact_store
 
         self.setup_retriever()
         self.setup_chain()
@@ -71,7 +78,7 @@ class Chatbot:
             None
         """
         question_answer_chain = create_stuff_documents_chain(
-            llm=self.llm,
+            llm=with_priority(self.llm, INTERACTIVE),
             prompt=chat_prompt,
         )
 
@@ -90,7 +97,10 @@ class Chatbot:
         Returns:
             None
         """
-        self.summarizer = MapReduceSummarizer(self.llm)
+        self.summarizer = MapReduceSummarizer(
+            self.llm,
+            artifact_store=self.artifact_store,
+        )
 
     def setup_keywords_extractor(self) -> None:
         """
@@ -102,7 +112,10 @@ class Chatbot:
         Returns:
             None
         """
-        self.keywords_extractor = KeywordsExtractor(self.llm)
+        self.keywords_extractor = KeywordsExtractor(
+            self.llm,
+            artifact_store=self.artifact_store,
+        )
 
     def ask(self, question: str) -> str:
         """
@@ -135,6 +148,18 @@ class Chatbot:
         """
         return self.summarizer(self.paper)
 
+    def stream_summary(self) -> Iterator[SummaryEvent]:
+        """
+        Summarizes the paper and streams the progress.
+
+        Args:
+            None
+
+        Returns:
+            (Iterator[SummaryEvent]): The summary events.
+        """
+        return self.summarizer.stream(self.paper)
+
     def extract_keywords(self) -> list[str]:
         """
         Extracts the keywords from the paper.
@@ -1,6 +1,9 @@
+from collections.abc import Iterator
+
 import colorama
 
 from paper_reader.chatbot import Chatbot
+from paper_reader.summarize import SummaryEvent
 
 
 def main(chatbot: Chatbot) -> None:
@@ -22,8 +25,7 @@ def main(chatbot: Chatbot) -> None:
             print("\033[2J\033[;H")
             continue
         elif question == "summarize":
-            summary = chatbot.summarize()
-            print_mangenta(summary)
+            print_summary_stream(chatbot.stream_summary())
             continue
         elif question == "keywords":
             keywords = chatbot.extract_keywords()
@@ -44,3 +46,17 @@ def print_mangenta(text: str) -> None:
 
 def print_blue(text: str) -> None:
     print(f"{colorama.Fore.BLUE}{text}{colorama.Fore.RESET}")
+
+
+def print_summary_stream(stream: Iterator[SummaryEvent]) -> None:
+    for event in stream:
+        if event.kind == "map":
+            print_blue(f"Summarized chunk {event.completed}/{event.total}")
+        else:
+            print(
+                f"{colorama.Fore.MAGENTA}{event.content}{colorama.Fore.RESET}",
+                end="",
+                flush=True,
+            )
+
+    print()
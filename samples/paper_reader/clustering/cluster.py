@@ -1,5 +1,3 @@
-import json
-
 import umap
 import numpy as np
 import pandas as pd
@@ -67,6 +65,8 @@ class KeywordClusterer:
         """
         Gets keywords in a category and embeds them then
         returns the keywords and embedded keywords.
+        Every distinct keyword is embedded once and repeated
+        once for every paper having it.
 
         Args:
             category_name: The name of the category.
@@ -80,13 +80,13 @@ class KeywordClusterer:
 
         raw_keywords = []
         embedded_keywords = []
-        for paper in self.db_manager.get_papers_by_category(category_id=category.id):
-            keywords = json.loads(paper.keywords)["keywords"]
-            for keyword in keywords:
+        for keyword, frequency in self.db_manager.get_keyword_frequencies(
+            category_id=category.id,
+        ):
+            embedding = np.array(self.embeddings.embed_query(keyword))
+            for _ in range(frequency):
                 raw_keywords.append(keyword)
-                embedded_keywords.append(
-                    np.array(self.embeddings.embed_query(keyword)),
-                )
+                embedded_keywords.append(embedding)
 
         raw_keywords = np.array(raw_keywords)
         embedded_keywords = np.array(embedded_keywords)
@@ -1,3 +1,3 @@
-from paper_reader.datamanager.dbmanager import DBManager
+from paper_reader.datamanager.dbmanager import DBManager, PaperRecord
 
-__all__ = ["DBManager"]
+__all__ = ["DBManager", "PaperRecord"]
@@ -1,29 +1,99 @@
 import json
+import threading
 
 import paper_reader.paper as P
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-from paper_reader.datamanager.models import Paper, Category, PaperCategory, Base
+from typing import NamedTuple
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import (
+    Engine,
+    Row,
+    create_engine,
+    delete,
+    event,
+    func,
+    inspect,
+    insert,
+    null,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.orm import Session, sessionmaker
+
+from paper_reader.datamanager.models import (
+    Base,
+    Category,
+    Keyword,
+    Paper,
+    PaperCategory,
+    PaperKeyword,
+)
+from paper_reader.datamanager.fingerprint import FileFingerprint
+
+
+class PaperRecord(NamedTuple):
+    paper: P.Paper | P.LazyPaper
+    keywords: list[str]
+    fingerprint: FileFingerprint | None = None
 
 
 class DBManager:
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, busy_timeout: float = 30.0) -> None:
         """
         Initializes the database manager.
+        Every call runs in its own short-lived session, so the manager can be
+        shared by several threads. On SQLite the database is put in WAL mode,
+        so readers do not block the writer, and writes wait up to `busy_timeout`
+        seconds for each other instead of failing with "database is locked".
 
         Args:
             db_path: The path to the database.
+            busy_timeout: The number of seconds a SQLite write waits for the lock.
 
         Returns:
             None
         """
         self.engine = create_engine(db_path)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        self.write_engine = self.engine
+        if self.engine.dialect.name == "sqlite":
+            configure_sqlite(self.engine, busy_timeout)
+            self.write_engine = self.engine.execution_options(sqlite_begin="IMMEDIATE")
+
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.WriteSession = sessionmaker(bind=self.write_engine, expire_on_commit=False)
+
+        self.ids_lock = threading.Lock()
+        self.category_ids: dict[str, int] = {}
+        self.keyword_ids: dict[str, int] = {}
         self.create_tables()
 
+    @contextmanager
+    def session_scope(self, write: bool = False) -> Iterator[Session]:
+        """
+        Opens a session that is committed when the block ends,
+        rolled back if it raises, and closed in both cases.
+        Objects loaded in the session stay readable after it is closed.
+
+        Args:
+            write: Whether the session writes, which on SQLite takes
+                the write lock when the transaction begins.
+
+        Returns:
+            (Iterator[Session]): The session.
+        """
+        session = self.WriteSession() if write else self.Session()
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     def create_tables(self) -> None:
         """
         Creates the tables.
@@ -35,39 +105,410 @@ class DBManager:
             None
         """
         Base.metadata.create_all(self.engine)
+        self.add_missing_columns()
+        self.add_missing_indexes()
+        self.migrate_keywords()
 
-    def add_paper(self, paper: P.Paper, keywords: list[str]) -> None:
+    def add_missing_columns(self) -> None:
         """
-        Adds the paper to the database.
+        Adds the columns missing from tables created by older versions.
 
         Args:
-            paper: The paper to add.
+            None
 
         Returns:
             None
         """
-        authors_json = json.dumps(
-            {
-                "authors": paper.authors,
+        for table in Base.metadata.sorted_tables:
+            existing = {
+                column["name"] for column in inspect(self.engine).get_columns(table.name)
             }
+            missing = [column for column in table.columns if column.name not in existing]
+            if not missing:
+                continue
+
+            with self.engine.begin() as connection:
+                for column in missing:
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    connection.execute(
+                        text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                    )
+
+    def add_missing_indexes(self) -> None:
+        """
+        Adds the indexes missing from tables created by older versions.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=self.engine, checkfirst=True)
+
+    def migrate_keywords(self, batch_size: int = 500) -> None:
+        """
+        Moves the keywords stored as JSON in the papers table into the keyword tables.
+        Migrated papers have their JSON cleared, so running it again is a no-op.
+
+        Args:
+            batch_size: The number of papers migrated in one transaction.
+
+        Returns:
+            None
+        """
+        while True:
+            new_keyword_ids: dict[str, int] = {}
+            with self.session_scope(write=True) as session:
+                rows = session.execute(
+                    select(Paper.id, Paper.keywords)
+                    .where(Paper.keywords.isnot(None))
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    return
+
+                self.set_paper_keywords(
+                    session,
+                    {paper_id: legacy_keywords(blob) for paper_id, blob in rows},
+                    new_keyword_ids,
+                    batch_size,
+                )
+                session.execute(
+                    update(Paper)
+                    .where(Paper.id.in_([paper_id for paper_id, _ in rows]))
+                    .values(keywords=null())
+                )
+
+            self.cache_ids(keyword_ids=new_keyword_ids)
+
+    def add_paper(
+        self,
+        paper: P.Paper | P.LazyPaper,
+        keywords: list[str],
+        fingerprint: FileFingerprint | None = None,
+    ) -> None:
+        """
+        Adds the paper to the database, or updates it if its url is already stored.
+
+        Args:
+            paper: The paper to add.
+            keywords: The keywords of the paper.
+            fingerprint: The fingerprint of the paper file, if any.
+
+        Returns:
+            None
+        """
+        new_keyword_ids: dict[str, int] = {}
+        with self.session_scope(write=True) as session:
+            row = session.scalars(select(Paper).where(Paper.url == paper.url)).first()
+            if row is None:
+                row = Paper()
+                session.add(row)
+
+            for column, value in paper_row(paper, fingerprint).items():
+                setattr(row, column, value)
+            session.flush()
+            self.set_paper_keywords(session, {row.id: keywords}, new_keyword_ids)
+
+        self.cache_ids(keyword_ids=new_keyword_ids)
+
+    def add_papers_bulk(
+        self,
+        records: Iterable[PaperRecord],
+        category_name: str,
+        batch_size: int = 500,
+    ) -> None:
+        """
+        Adds the papers and their category in a single transaction.
+        Papers are inserted or updated by url and linked to the category with
+        executemany statements, instead of several queries and a commit per paper.
+
+        Args:
+            records: The papers with their keywords and file fingerprints.
+            category_name: The name of the category of the papers.
+            batch_size: The number of urls looked up in one query.
+
+        Returns:
+            None
+        """
+        rows = {}
+        keywords_by_url = {}
+        for paper, keywords, fingerprint in records:
+            rows[paper.url] = paper_row(paper, fingerprint)
+            keywords_by_url[paper.url] = keywords
+        if not rows:
+            return
+
+        new_category_ids: dict[str, int] = {}
+        new_keyword_ids: dict[str, int] = {}
+        with self.session_scope(write=True) as session:
+            category_id = self.get_or_add_category_id(session, category_name, new_category_ids)
+
+            paper_ids = self.get_paper_ids(session, list(rows), batch_size)
+            new_rows = [row for url, row in rows.items() if url not in paper_ids]
+            if new_rows:
+                session.execute(insert(Paper), new_rows)
+            existing_rows = [
+                {"id": paper_ids[url], **row} for url, row in rows.items() if url in paper_ids
+            ]
+            if existing_rows:
+                session.execute(update(Paper), existing_rows)
+
+            paper_ids = self.get_paper_ids(session, list(rows), batch_size)
+            self.set_paper_keywords(
+                session,
+                {paper_ids[url]: keywords for url, keywords in keywords_by_url.items()},
+                new_keyword_ids,
+                batch_size,
+            )
+
+            linked_ids = set()
+            ids = list(paper_ids.values())
+            for start in range(0, len(ids), batch_size):
+                linked_ids.update(
+                    session.scalars(
+                        select(PaperCategory.paper_id).where(
+                            PaperCategory.category_id == category_id,
+                            PaperCategory.paper_id.in_(ids[start : start + batch_size]),
+                        )
+                    )
+                )
+            links = [
+                {"paper_id": paper_id, "category_id": category_id}
+                for paper_id in ids
+                if paper_id not in linked_ids
+            ]
+            if links:
+                session.execute(insert(PaperCategory), links)
+
+        self.cache_ids(category_ids=new_category_ids, keyword_ids=new_keyword_ids)
+
+    def cache_ids(
+        self,
+        category_ids: dict[str, int] | None = None,
+        keyword_ids: dict[str, int] | None = None,
+    ) -> None:
+        """
+        Caches the ids of committed categories and keywords.
+
+        Args:
+            category_ids: The category ids by name, if any.
+            keyword_ids: The keyword ids by keyword, if any.
+
+        Returns:
+            None
+        """
+        with self.ids_lock:
+            self.category_ids.update(category_ids or {})
+            self.keyword_ids.update(keyword_ids or {})
+
+    def set_paper_keywords(
+        self,
+        session: Session,
+        keywords_by_paper: dict[int, list[str]],
+        new_keyword_ids: dict[str, int],
+        batch_size: int = 500,
+    ) -> None:
+        """
+        Replaces the keywords of the papers in the session.
+
+        Args:
+            session: The session of the transaction.
+            keywords_by_paper: The keywords by paper id.
+            new_keyword_ids: The ids of the keywords added in the transaction, updated in place.
+            batch_size: The number of values sent in one query.
+
+        Returns:
+            None
+        """
+        paper_ids = list(keywords_by_paper)
+        for start in range(0, len(paper_ids), batch_size):
+            session.execute(
+                delete(PaperKeyword).where(
+                    PaperKeyword.paper_id.in_(paper_ids[start : start + batch_size])
+                )
+            )
+
+        keyword_ids = self.get_or_add_keyword_ids(
+            session,
+            [keyword for keywords in keywords_by_paper.values() for keyword in keywords],
+            new_keyword_ids,
+            batch_size,
         )
+        links = [
+            {"paper_id": paper_id, "keyword_id": keyword_ids[keyword], "position": position}
+            for paper_id, keywords in keywords_by_paper.items()
+            for position, keyword in enumerate(dict.fromkeys(keywords))
+        ]
+        if links:
+            session.execute(insert(PaperKeyword), links)
+
+    def get_or_add_keyword_ids(
+        self,
+        session: Session,
+        keywords: list[str],
+        new_keyword_ids: dict[str, int],
+        batch_size: int = 500,
+    ) -> dict[str, int]:
+        """
+        Returns the ids of the keywords, adding the keywords that do not exist.
+        Committed ids are cached, while the ids of keywords added in the transaction
+        are collected in `new_keyword_ids` until it is committed.
+
+        Args:
+            session: The session of the transaction.
+            keywords: The keywords.
+            new_keyword_ids: The ids of the keywords added in the transaction, updated in place.
+            batch_size: The number of keywords looked up in one query.
 
-        keywords_json = json.dumps(
+        Returns:
+            (dict[str, int]): The keyword ids by keyword.
+        """
+        with self.ids_lock:
+            keyword_ids = {
+                keyword: self.keyword_ids[keyword]
+                for keyword in keywords
+                if keyword in self.keyword_ids
+            }
+        keyword_ids.update(
             {
-                "keywords": keywords,
+                keyword: new_keyword_ids[keyword]
+                for keyword in keywords
+                if keyword in new_keyword_ids
             }
         )
 
-        paper = Paper(
-            url=paper.url,
-            title=paper.title,
-            authors=authors_json,
-            year=paper.year,
-            abstract=paper.abstract,
-            keywords=keywords_json,
-        )
-        self.session.add(paper)
-        self.session.commit()
+        missing = [keyword for keyword in dict.fromkeys(keywords) if keyword not in keyword_ids]
+        stored = select_keyword_ids(session, missing, batch_size)
+        self.cache_ids(keyword_ids=stored)
+        keyword_ids.update(stored)
+
+        new_keywords = [keyword for keyword in missing if keyword not in keyword_ids]
+        if new_keywords:
+            session.execute(
+                insert(Keyword),
+                [{"name": keyword} for keyword in new_keywords],
+            )
+            added = select_keyword_ids(session, new_keywords, batch_size)
+            new_keyword_ids.update(added)
+            keyword_ids.update(added)
+
+        return keyword_ids
+
+    def get_or_add_category_id(
+        self,
+        session: Session,
+        name: str,
+        new_category_ids: dict[str, int],
+    ) -> int:
+        """
+        Returns the id of the category, adding the category if it does not exist.
+        Committed ids are cached, while the id of a category added in the transaction
+        is collected in `new_category_ids` until it is committed.
+
+        Args:
+            session: The session of the transaction.
+            name: The name of the category.
+            new_category_ids: The ids of the categories added in the transaction, updated in place.
+
+        Returns:
+            (int): The id of the category.
+        """
+        with self.ids_lock:
+            category_id = self.category_ids.get(name)
+        if category_id is None:
+            category_id = new_category_ids.get(name)
+        if category_id is not None:
+            return category_id
+
+        category = session.scalars(select(Category).where(Category.name == name)).first()
+        if category is not None:
+            self.cache_ids(category_ids={name: category.id})
+            return category.id
+
+        category = Category(name=name)
+        session.add(category)
+        session.flush()
+        new_category_ids[name] = category.id
+
+        return category.id
+
+    def get_paper_ids(
+        self,
+        session: Session,
+        urls: list[str],
+        batch_size: int = 500,
+    ) -> dict[str, int]:
+        """
+        Returns the ids of the stored papers among the urls.
+
+        Args:
+            session: The session of the transaction.
+            urls: The urls of the papers.
+            batch_size: The number of urls looked up in one query.
+
+        Returns:
+            (dict[str, int]): The paper ids by url.
+        """
+        paper_ids = {}
+        for start in range(0, len(urls), batch_size):
+            rows = session.execute(
+                select(Paper.url, Paper.id).where(Paper.url.in_(urls[start : start + batch_size]))
+            )
+            paper_ids.update({url: paper_id for url, paper_id in rows})
+
+        return paper_ids
+
+    def update_file_fingerprint(self, paper_url: str, fingerprint: FileFingerprint) -> None:
+        """
+        Updates the stored fingerprint of the paper file.
+
+        Args:
+            paper_url: The url of the paper.
+            fingerprint: The fingerprint of the paper file.
+
+        Returns:
+            None
+        """
+        with self.session_scope(write=True) as session:
+            session.execute(
+                update(Paper)
+                .where(Paper.url == paper_url)
+                .values(
+                    file_size=fingerprint.size,
+                    file_mtime_ns=fingerprint.mtime_ns,
+                    file_hash=fingerprint.hash,
+                )
+            )
+
+    def get_file_fingerprints(self) -> dict[str, FileFingerprint]:
+        """
+        Returns the stored fingerprints of the paper files.
+        Papers added without a fingerprint are left out.
+
+        Args:
+            None
+
+        Returns:
+            (dict[str, FileFingerprint]): The fingerprints by paper url.
+        """
+        with self.session_scope() as session:
+            rows = session.execute(
+                select(
+                    Paper.url,
+                    Paper.file_size,
+                    Paper.file_mtime_ns,
+                    Paper.file_hash,
+                ).where(Paper.file_size.isnot(None))
+            )
+
+            return {
+                url: FileFingerprint(size=size, mtime_ns=mtime_ns, hash=file_hash)
+                for url, size, mtime_ns, file_hash in rows
+            }
 
     def add_category_by_name(self, name: str):
         """
@@ -79,13 +520,12 @@ class DBManager:
         Returns:
             None
         """
-        category = Category(name=name)
-        self.session.add(category)
-        self.session.commit()
+        with self.session_scope(write=True) as session:
+            session.add(Category(name=name))
 
     def add_paper_category(self, paper_url: str, category_name: str):
         """
-        Adds the paper category to the database.
+        Adds the paper category to the database, unless the paper is already in the category.
 
         Args:
             paper_url: The url of the paper.
@@ -94,11 +534,15 @@ class DBManager:
         Returns:
             None
         """
-        category_id = self.get_category_by_name(category_name).id
-        paper_id = self.get_paper_by_url(paper_url).id
-        paper_category = PaperCategory(paper_id=paper_id, category_id=category_id)
-        self.session.add(paper_category)
-        self.session.commit()
+        with self.session_scope(write=True) as session:
+            category_id = session.scalars(
+                select(Category.id).where(Category.name == category_name)
+            ).one()
+            paper_id = session.scalars(select(Paper.id).where(Paper.url == paper_url)).one()
+            if session.get(PaperCategory, (paper_id, category_id)) is not None:
+                return
+
+            session.add(PaperCategory(paper_id=paper_id, category_id=category_id))
 
     def get_paper_by_id(self, paper_id: int) -> Paper:
         """
@@ -110,7 +554,8 @@ class DBManager:
         Returns:
             (Paper): The paper.
         """
-        return self.session.query(Paper).filter_by(id=paper_id).first()
+        with self.session_scope() as session:
+            return session.get(Paper, paper_id)
 
     def get_paper_by_url(self, url: str) -> Paper:
         """
@@ -122,7 +567,8 @@ class DBManager:
         Returns:
             (Paper): The paper.
         """
-        return self.session.query(Paper).filter_by(url=url).first()
+        with self.session_scope() as session:
+            return session.scalars(select(Paper).where(Paper.url == url)).first()
 
     def get_papers_by_category(self, category_id: int) -> list[Paper]:
         """
@@ -134,17 +580,65 @@ class DBManager:
         Returns:
             (list[Paper]): The papers.
         """
-        return (
-            self.session.query(Paper)
-            .join(PaperCategory)
-            .join(Category)
-            .filter(Category.id == category_id)
-            .all()
+        return list(self.iter_papers_by_category(category_id))
+
+    def iter_papers_by_category(
+        self,
+        category_id: int,
+        batch_size: int = 1000,
+    ) -> Iterator[Paper]:
+        """
+        Iterates over the papers by the category id, fetching them in batches.
+
+        Args:
+            category_id: The id of the category.
+            batch_size: The number of papers fetched at a time.
+
+        Returns:
+            (Iterator[Paper]): The papers.
+        """
+        query = (
+            select(Paper)
+            .join(PaperCategory, PaperCategory.paper_id == Paper.id)
+            .where(PaperCategory.category_id == category_id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        with self.session_scope() as session:
+            yield from session.scalars(query)
+
+    def iter_paper_columns_by_category(
+        self,
+        category_id: int,
+        columns: Iterable[str] = ("id", "url", "title"),
+        batch_size: int = 1000,
+    ) -> Iterator[Row]:
+        """
+        Iterates over the chosen columns of the papers by the category id.
+        Rows are plain tuples fetched in batches, not ORM objects, so walking
+        a large category keeps neither whole papers nor an identity map in memory.
+
+        Args:
+            category_id: The id of the category.
+            columns: The names of the paper columns.
+            batch_size: The number of rows fetched at a time.
+
+        Returns:
+            (Iterator[Row]): The rows, with the columns as attributes.
+        """
+        query = (
+            select(*(getattr(Paper, column) for column in columns))
+            .join(PaperCategory, PaperCategory.paper_id == Paper.id)
+            .where(PaperCategory.category_id == category_id)
+            .execution_options(yield_per=batch_size)
         )
 
+        with self.session_scope() as session:
+            yield from session.execute(query)
+
     def get_keywords_by_category(self, category_id: int) -> list[str]:
         """
-        Returns the keywords by the category id.
+        Returns the keywords by the category id, once for every paper having them.
 
         Args:
             category_id: The id of the category.
@@ -152,14 +646,105 @@ class DBManager:
         Returns:
             (list[str]): The keywords.
         """
-        papers = self.get_papers_by_category(category_id)
+        return list(self.iter_keywords_by_category(category_id))
+
+    def iter_keywords_by_category(
+        self,
+        category_id: int,
+        batch_size: int = 1000,
+    ) -> Iterator[str]:
+        """
+        Iterates over the keywords by the category id, once for every paper having them.
+
+        Args:
+            category_id: The id of the category.
+            batch_size: The number of keywords fetched at a time.
+
+        Returns:
+            (Iterator[str]): The keywords.
+        """
+        query = (
+            select(Keyword.name)
+            .join(PaperKeyword, PaperKeyword.keyword_id == Keyword.id)
+            .join(PaperCategory, PaperCategory.paper_id == PaperKeyword.paper_id)
+            .where(PaperCategory.category_id == category_id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        with self.session_scope() as session:
+            yield from session.scalars(query)
+
+    def get_keyword_frequencies(
+        self,
+        category_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[tuple[str, int]]:
+        """
+        Returns the keywords with the number of papers having them, most frequent first.
+
+        Args:
+            category_id: The id of the category, or None for every paper.
+            limit: The maximum number of keywords, if any.
+
+        Returns:
+            (list[tuple[str, int]]): The keywords and their frequencies.
+        """
+        frequency = func.count(PaperKeyword.paper_id).label("frequency")
+        query = (
+            select(Keyword.name, frequency)
+            .join(PaperKeyword, PaperKeyword.keyword_id == Keyword.id)
+            .group_by(Keyword.id)
+            .order_by(frequency.desc(), Keyword.name)
+            .limit(limit)
+        )
+        if category_id is not None:
+            query = query.join(
+                PaperCategory,
+                PaperCategory.paper_id == PaperKeyword.paper_id,
+            ).where(PaperCategory.category_id == category_id)
 
-        keywords = []
-        for paper in papers:
-            paper_keywords = json.loads(paper.keywords)["keywords"]
-            keywords.extend(paper_keywords)
+        with self.session_scope() as session:
+            return [(name, count) for name, count in session.execute(query)]
+
+    def get_papers_by_keyword(self, keyword: str) -> list[Paper]:
+        """
+        Returns the papers having the keyword.
 
-        return keywords
+        Args:
+            keyword: The keyword.
+
+        Returns:
+            (list[Paper]): The papers.
+        """
+        with self.session_scope() as session:
+            return list(
+                session.scalars(
+                    select(Paper)
+                    .join(PaperKeyword, PaperKeyword.paper_id == Paper.id)
+                    .join(Keyword, Keyword.id == PaperKeyword.keyword_id)
+                    .where(Keyword.name == keyword)
+                )
+            )
+
+    def get_paper_keywords(self, paper_id: int) -> list[str]:
+        """
+        Returns the keywords of the paper, in the order they were extracted.
+
+        Args:
+            paper_id: The id of the paper.
+
+        Returns:
+            (list[str]): The keywords.
+        """
+        with self.session_scope() as session:
+            return list(
+                session.scalars(
+                    select(Keyword.name)
+                    .join(PaperKeyword, PaperKeyword.keyword_id == Keyword.id)
+                    .where(PaperKeyword.paper_id == paper_id)
+                    .order_by(PaperKeyword.position)
+                )
+            )
 
     def get_categories(self) -> list[Category]:
         """
@@ -171,7 +756,8 @@ class DBManager:
         Returns:
             (list[Category]): The categories.
         """
-        return self.session.query(Category).all()
+        with self.session_scope() as session:
+            return list(session.scalars(select(Category)))
 
     def get_category_by_id(self, category_id: int) -> Category:
         """
@@ -183,7 +769,8 @@ class DBManager:
         Returns:
             (Category): The category.
         """
-        return self.session.query(Category).filter_by(id=category_id).first()
+        with self.session_scope() as session:
+            return session.get(Category, category_id)
 
     def get_category_by_name(self, name: str) -> Category:
         """
@@ -195,4 +782,115 @@ class DBManager:
         Returns:
             (Category): The category.
         """
-        return self.session.query(Category).filter_by(name=name).first()
+        with self.session_scope() as session:
+            return session.scalars(select(Category).where(Category.name == name)).first()
+
+
+def configure_sqlite(engine: Engine, busy_timeout: float) -> None:
+    """
+    Sets up every SQLite connection of the engine for concurrent use:
+    WAL journal, normal synchronous mode and a busy timeout. Transactions are
+    begun by SQLAlchemy, with BEGIN IMMEDIATE for write sessions, so a writer
+    takes the lock up front instead of failing when it upgrades a read lock.
+
+    Args:
+        engine: The SQLite engine.
+        busy_timeout: The number of seconds a write waits for the lock.
+
+    Returns:
+        None
+    """
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record) -> None:
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def on_begin(connection) -> None:
+        begin = connection.get_execution_options().get("sqlite_begin", "DEFERRED")
+        connection.exec_driver_sql(f"BEGIN {begin}")
+
+
+def select_keyword_ids(
+    session: Session,
+    keywords: list[str],
+    batch_size: int = 500,
+) -> dict[str, int]:
+    """
+    Returns the ids of the stored keywords among the keywords.
+
+    Args:
+        session: The session of the transaction.
+        keywords: The keywords.
+        batch_size: The number of keywords looked up in one query.
+
+    Returns:
+        (dict[str, int]): The keyword ids by keyword.
+    """
+    keyword_ids = {}
+    for start in range(0, len(keywords), batch_size):
+        rows = session.execute(
+            select(Keyword.name, Keyword.id).where(
+                Keyword.name.in_(keywords[start : start + batch_size])
+            )
+        )
+        keyword_ids.update({name: keyword_id for name, keyword_id in rows})
+
+    return keyword_ids
+
+
+def paper_row(
+    paper: P.Paper | P.LazyPaper,
+    fingerprint: FileFingerprint | None = None,
+) -> dict:
+    """
+    Makes the column values of the paper.
+    Keywords are stored in their own tables, not in the row.
+
+    Args:
+        paper: The paper.
+        fingerprint: The fingerprint of the paper file, if any.
+
+    Returns:
+        (dict): The column values.
+    """
+    row = {
+        "url": paper.url,
+        "title": paper.title,
+        "authors": json.dumps({"authors": paper.authors}),
+        "year": paper.year,
+        "abstract": paper.abstract,
+    }
+    if fingerprint is not None:
+        row["file_size"] = fingerprint.size
+        row["file_mtime_ns"] = fingerprint.mtime_ns
+        row["file_hash"] = fingerprint.hash
+
+    return row
+
+
+def legacy_keywords(blob: str | dict | None) -> list[str]:
+    """
+    Reads the keywords stored as JSON by older versions.
+
+    Args:
+        blob: The stored JSON, either encoded or already decoded.
+
+    Returns:
+        (list[str]): The keywords, empty if the JSON is malformed.
+    """
+    if isinstance(blob, str):
+        try:
+            blob = json.loads(blob)
+        except json.JSONDecodeError:
+            return []
+
+    if not isinstance(blob, dict) or not isinstance(blob.get("keywords"), list):
+        return []
+
+    return [keyword for keyword in blob["keywords"] if isinstance(keyword, str)]
@@ -0,0 +1,47 @@
+import hashlib
+
+from pathlib import Path
+from typing import NamedTuple
+
+
+class FileFingerprint(NamedTuple):
+    size: int
+    mtime_ns: int
+    hash: str | None
+
+
+def file_fingerprint(path: Path, with_hash: bool = True) -> FileFingerprint:
+    """
+    Returns the fingerprint of the file.
+
+    Args:
+        path: The path to the file.
+        with_hash: Whether to hash the content of the file, which reads the whole file.
+
+    Returns:
+        (FileFingerprint): The fingerprint.
+    """
+    stat = path.stat()
+    return FileFingerprint(
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        hash=file_hash(path) if with_hash else None,
+    )
+
+
+def file_hash(path: Path) -> str:
+    """
+    Returns the SHA-256 hex digest of the content of the file.
+
+    Args:
+        path: The path to the file.
+
+    Returns:
+        (str): The hex digest.
+    """
+    hasher = hashlib.sha256()
+    with path.open("rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            hasher.update(block)
+
+    return hasher.hexdigest()
@@ -31,7 +31,11 @@ class Paper(Base):
     year = Column(Integer)
     url = Column(String, unique=True)
     abstract = Column(String)
+    # Only read to migrate older databases, keywords live in the keyword tables.
     keywords = Column(JSON)
+    file_size = Column(Integer)
+    file_mtime_ns = Column(Integer)
+    file_hash = Column(String)
 
     categories = relationship(
         "Category",
@@ -55,4 +59,32 @@ class PaperCategory(Base):
         Integer,
         ForeignKey("categories.id"),
         primary_key=True,
+        index=True,
     )
+
+
+class Keyword(Base):
+    __tablename__ = "keywords"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"Keyword(id={self.id}, name={self.name})"
+
+
+class PaperKeyword(Base):
+    __tablename__ = "paper_keywords"
+
+    paper_id = Column(
+        Integer,
+        ForeignKey("papers.id"),
+        primary_key=True,
+    )
+    keyword_id = Column(
+        Integer,
+        ForeignKey("keywords.id"),
+        primary_key=True,
+        index=True,
+    )
+    position = Column(Integer)
@@ -1,42 +1,287 @@
+import time
+
 from pathlib import Path
+from typing import NamedTuple
+from collections.abc import Iterable
 
 from langchain_core.language_models.chat_models import BaseChatModel
 
-from paper_reader.paper import Paper
-from paper_reader.datamanager import DBManager
+from paper_reader.paper import Paper, LazyPaper, PageCache
+from paper_reader.paper.utils import load_papers_from_paths
+from paper_reader.datamanager import DBManager, PaperRecord
+from paper_reader.datamanager.fingerprint import FileFingerprint, file_fingerprint
 from paper_reader.keywords import KeywordsExtractor
+from paper_reader.artifacts import ArtifactStore
+from paper_reader.llm import BATCH, with_priority
+
+
+class DirectoryDiff(NamedTuple):
+    changed: dict[Path, FileFingerprint]
+    touched: dict[Path, FileFingerprint]
+    unchanged: list[Path]
 
 
 def add_papers_to_db(
     llm: BaseChatModel,
     db_manager: DBManager,
-    papers: list[Paper],
+    papers: Iterable[Paper | LazyPaper],
     category_name: str,
-) -> None:
+    artifact_store: ArtifactStore | None = None,
+    abstract_first: bool = False,
+    fingerprints: dict[str, FileFingerprint] | None = None,
+    batch_size: int = 64,
+    keywords_extractor: KeywordsExtractor | None = None,
+) -> list[str]:
     """
     Adds the papers to the database.
+    Keywords are extracted for several papers at a time and a paper
+    whose extraction fails is skipped. The pages of lazy papers are
+    released once their keywords are extracted. The papers are written
+    in batches, each in a single transaction. The keywords JSON parsing is
+    reported at the end, together with the share of papers served from the
+    abstract alone in abstract-first mode.
 
     Args:
         llm: The language model.
         db_manager: The database manager.
         papers: The papers to add.
         category_name: The name of the category of the papers.
+        artifact_store: The store consulted for keywords of already processed papers.
+        abstract_first: Whether to extract keywords from the abstract alone when it is enough.
+        fingerprints: The fingerprints of the paper files by paper url, if any.
+        batch_size: The number of papers written in one transaction.
+        keywords_extractor: The keywords extractor, whose statistics the caller can read
+            afterwards. If not given, one is made from `llm`, `artifact_store`
+            and `abstract_first`.
 
     Returns:
-        None
+        (list[str]): The urls of the papers written to the database.
     """
-    keywords_extractor = KeywordsExtractor(llm=llm)
-    for paper in papers:
-        keywords = keywords_extractor(paper)
-        db_manager.add_paper(
-            paper=paper,
-            keywords=keywords,
+    fingerprints = fingerprints or {}
+    if keywords_extractor is None:
+        keywords_extractor = KeywordsExtractor(
+            llm=with_priority(llm, BATCH),
+            artifact_store=artifact_store,
+            abstract_first=abstract_first,
+        )
+    records: list[PaperRecord] = []
+    written: list[str] = []
+    for result in keywords_extractor.extract_many(papers):
+        paper = result.paper
+        if isinstance(paper, LazyPaper):
+            paper.release()
+
+        if result.error is not None:
+            print(f"Error extracting keywords of {paper.url}: {result.error}")
+            continue
+
+        records.append(
+            PaperRecord(
+                paper=paper,
+                keywords=result.keywords,
+                fingerprint=fingerprints.get(paper.url),
+            )
         )
+        if len(records) >= batch_size:
+            db_manager.add_papers_bulk(records, category_name)
+            written.extend(record.paper.url for record in records)
+            records = []
+
+    if records:
+        db_manager.add_papers_bulk(records, category_name)
+        written.extend(record.paper.url for record in records)
+
+    print(keywords_extractor.json_parser.report("Keywords"))
+    if keywords_extractor.abstract_first:
+        print(keywords_extractor.report())
+
+    return written
+
+
+def diff_directory(
+    db_manager: DBManager,
+    path: Path,
+    settle_seconds: float = 0.0,
+) -> DirectoryDiff:
+    """
+    Compares the PDFs of the directory with the papers in the database.
+    Files whose size and modification time match the database are skipped
+    without being read. The others are hashed, and the ones whose content
+    did not change are only touched.
+
+    Args:
+        db_manager: The database manager.
+        path: The path to the papers.
+        settle_seconds: The time a file must stay unmodified before it is considered,
+            so that files still being written are left for a later run.
+
+    Returns:
+        (DirectoryDiff): The new or changed files, the touched files and the unchanged files.
+    """
+    known = db_manager.get_file_fingerprints()
+    now_ns = time.time_ns()
+
+    diff = DirectoryDiff(changed={}, touched={}, unchanged=[])
+    for file in sorted(path.iterdir()):
+        if file.suffix != ".pdf":
+            continue
+
+        stat = file.stat()
+        if now_ns - stat.st_mtime_ns < settle_seconds * 1e9:
+            continue
+
+        stored = known.get(str(file))
+        if (
+            stored is not None
+            and stored.size == stat.st_size
+            and stored.mtime_ns == stat.st_mtime_ns
+        ):
+            diff.unchanged.append(file)
+            continue
+
+        fingerprint = file_fingerprint(file)
+        if stored is not None and stored.hash == fingerprint.hash:
+            diff.touched[file] = fingerprint
+        else:
+            diff.changed[file] = fingerprint
+
+    return diff
+
+
+def ingest_directory(
+    llm: BaseChatModel,
+    db_manager: DBManager,
+    path: Path,
+    category_name: str,
+    artifact_store: ArtifactStore | None = None,
+    page_cache: PageCache | None = None,
+    abstract_first: bool = False,
+    max_workers: int | None = None,
+    settle_seconds: float = 0.0,
+    keywords_extractor: KeywordsExtractor | None = None,
+    failed: dict[Path, FileFingerprint] | None = None,
+) -> DirectoryDiff:
+    """
+    Adds the new or changed PDFs of the directory to the database.
+    Known files are skipped, so a re-run only costs as much as the files
+    that changed since the last one. Files that fail are not stored and
+    are retried on the next run, unless they are recorded in `failed`,
+    in which case they are skipped until their content changes.
 
-        if db_manager.get_category_by_name(category_name) is None:
-            db_manager.add_category_by_name(category_name)
+    Args:
+        llm: The language model.
+        db_manager: The database manager.
+        path: The path to the papers.
+        category_name: The name of the category of the papers.
+        artifact_store: The store consulted for the info and keywords of already processed papers.
+        page_cache: The cache of parsed pages, if any.
+        abstract_first: Whether to extract keywords from the abstract alone when it is enough.
+        max_workers: The number of processes parsing the PDFs, the number of CPUs by default.
+        settle_seconds: The time a file must stay unmodified before it is ingested.
+        keywords_extractor: The keywords extractor, made from the other arguments if not given.
+        failed: The fingerprints of the files that failed in earlier runs, updated in place.
 
-        db_manager.add_paper_category(
-            paper.url,
-            category_name,
+    Returns:
+        (DirectoryDiff): The diff of the directory against the database.
+    """
+    diff = diff_directory(db_manager, path, settle_seconds)
+    for file, fingerprint in diff.touched.items():
+        db_manager.update_file_fingerprint(str(file), fingerprint)
+
+    failed = failed if failed is not None else {}
+    pending = {
+        file: fingerprint
+        for file, fingerprint in diff.changed.items()
+        if failed.get(file) != fingerprint
+    }
+
+    written: list[str] = []
+    if pending:
+        papers = load_papers_from_paths(
+            llm=llm,
+            paths=list(pending),
+            artifact_store=artifact_store,
+            max_workers=max_workers,
+            page_cache=page_cache,
+            lazy=True,
         )
+        written = add_papers_to_db(
+            llm=llm,
+            db_manager=db_manager,
+            papers=papers,
+            category_name=category_name,
+            artifact_store=artifact_store,
+            abstract_first=abstract_first,
+            fingerprints={str(file): fingerprint for file, fingerprint in pending.items()},
+            keywords_extractor=keywords_extractor,
+        )
+
+    stored = set(written)
+    for file, fingerprint in pending.items():
+        if str(file) in stored:
+            failed.pop(file, None)
+        else:
+            failed[file] = fingerprint
+
+    print(
+        f"Ingested {len(written)} new or changed papers, "
+        f"{len(pending) - len(stored)} failed, "
+        f"skipped {len(diff.unchanged) + len(diff.touched)} known ones "
+        f"and {len(diff.changed) - len(pending)} unchanged failed ones."
+    )
+
+    return diff
+
+
+def watch_directory(
+    llm: BaseChatModel,
+    db_manager: DBManager,
+    path: Path,
+    category_name: str,
+    interval: float = 30.0,
+    settle_seconds: float = 5.0,
+    artifact_store: ArtifactStore | None = None,
+    page_cache: PageCache | None = None,
+    abstract_first: bool = False,
+    max_workers: int | None = None,
+    keywords_extractor: KeywordsExtractor | None = None,
+) -> None:
+    """
+    Polls the directory and ingests the PDFs as they land, until interrupted.
+    Files that fail are skipped on later polls until their content changes.
+
+    Args:
+        llm: The language model.
+        db_manager: The database manager.
+        path: The path to the papers.
+        category_name: The name of the category of the papers.
+        interval: The number of seconds between two polls.
+        settle_seconds: The time a file must stay unmodified before it is ingested.
+        artifact_store: The store consulted for the info and keywords of already processed papers.
+        page_cache: The cache of parsed pages, if any.
+        abstract_first: Whether to extract keywords from the abstract alone when it is enough.
+        max_workers: The number of processes parsing the PDFs, the number of CPUs by default.
+        keywords_extractor: The keywords extractor, made from the other arguments if not given.
+
+    Returns:
+        None
+    """
+    failed: dict[Path, FileFingerprint] = {}
+    try:
+        while True:
+            ingest_directory(
+                llm=llm,
+                db_manager=db_manager,
+                path=path,
+                category_name=category_name,
+                artifact_store=artifact_store,
+                page_cache=page_cache,
+                abstract_first=abstract_first,
+                max_workers=max_workers,
+                settle_seconds=settle_seconds,
+                keywords_extractor=keywords_extractor,
+                failed=failed,
+            )
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print(f"Stopped watching {path}.")
@@ -1,3 +1,3 @@
-from paper_reader.keywords.keywords_extractor import KeywordsExtractor
+from paper_reader.keywords.keywords_extractor import KeywordsExtractor, KeywordsResult
 
-__all__ = ["KeywordsExtractor"]
+__all__ = ["KeywordsExtractor", "KeywordsResult"]
@@ -1,24 +1,86 @@
-import json
+import threading
+
+from typing import NamedTuple
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.output_parsers.string import StrOutputParser
 
-from paper_reader.paper import Paper
+from paper_reader.paper import Paper, LazyPaper
+from paper_reader.artifacts import ArtifactStore, artifact_version
+from paper_reader.llm import SalvagingJSONParser, without_cache
 from paper_reader.summarize import MapReduceSummarizer
-from paper_reader.prompts import extract_keywords_prompt
+from paper_reader.prompts import extract_keywords_prompt, KEYWORDS_JSON_SCHEMA
+
+
+NO_SUMMARY = "No summary is available, rely on the abstract."
+
+
+class KeywordsResult(NamedTuple):
+    paper: Paper | LazyPaper
+    keywords: list[str]
+    error: Exception | None
 
 
 class KeywordsExtractor:
-    def __init__(self, llm: BaseChatModel, chunk_size: int = 2500) -> None:
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        chunk_size: int = 6000,
+        context_window: int | None = None,
+        tokenizer: Callable[[str], int] | None = None,
+        artifact_store: ArtifactStore | None = None,
+        use_cache: bool = True,
+        abstract_first: bool = False,
+        min_abstract_words: int = 100,
+        min_keywords: int = 5,
+    ) -> None:
+        """
+        Initializes the keywords extractor.
+
+        Args:
+            llm: The LLM to use.
+            chunk_size: The size of the summarized chunks in characters.
+            context_window: The context window of the LLM in tokens.
+                If given, chunks are sized in tokens instead of `chunk_size`.
+            tokenizer: The function counting tokens, estimated from the text length by default.
+            artifact_store: The store consulted for keywords and summaries of known papers.
+            use_cache: Whether the chains may use the LLM response cache.
+            abstract_first: Whether to extract from the abstract alone first and
+                summarize the paper only when the abstract is not enough.
+            min_abstract_words: The number of words below which an abstract is too short.
+            min_keywords: The number of keywords below which the abstract alone is not enough.
+
+        Returns:
+            None
+        """
         self.llm = llm
         self.chunk_size = chunk_size
-        self.summarizer = MapReduceSummarizer(self.llm)
+        self.artifact_store = artifact_store
+        self.abstract_first = abstract_first
+        self.min_abstract_words = min_abstract_words
+        self.min_keywords = min_keywords
+
+        self.stats_lock = threading.Lock()
+        self.fast_paths = 0
+        self.escalations: Counter[str] = Counter()
+        self.summarizer = MapReduceSummarizer(
+            self.llm,
+            context_window=context_window,
+            tokenizer=tokenizer,
+            artifact_store=artifact_store,
+            use_cache=use_cache,
+        )
 
+        chain_llm = self.llm if use_cache else without_cache(self.llm)
         self.extract_keywords_chain = (
-            extract_keywords_prompt | self.llm | StrOutputParser()
+            extract_keywords_prompt | chain_llm | StrOutputParser()
         )
+        self.json_parser = SalvagingJSONParser(llm=chain_llm)
 
-    def __call__(self, paper: Paper) -> list[str]:
+    def __call__(self, paper: Paper | LazyPaper) -> list[str]:
         """
         Extracts the keywords from the paper.
 
@@ -28,12 +90,159 @@ class KeywordsExtractor:
         Returns:
             list[str]: The keywords.
         """
-        abstract = paper.abstract
-        summary = self.summarizer(paper)
-        keywords = self.extract_keywords(abstract, summary)
+        if self.artifact_store is None:
+            return self.compute_keywords(paper)
+
+        version = self.keywords_version(paper)
+        keywords = self.artifact_store.get(paper.pages, "keywords", version)
+        if keywords is None:
+            keywords = self.compute_keywords(paper)
+            if keywords:
+                self.artifact_store.put(paper.pages, "keywords", version, keywords)
 
         return keywords
 
+    def extract_many(
+        self,
+        papers: Iterable[Paper | LazyPaper],
+        max_workers: int = 4,
+        ordered: bool = True,
+    ) -> Iterator[KeywordsResult]:
+        """
+        Extracts the keywords of many papers through a bounded worker pool.
+        At most `2 * max_workers` papers are pending at a time, and an error
+        in one paper is returned in its result instead of stopping the batch.
+
+        Args:
+            papers: The papers to extract the keywords from.
+            max_workers: The number of papers processed at the same time.
+            ordered: Whether to yield the results in submission order or as they complete.
+
+        Returns:
+            (Iterator[KeywordsResult]): The results.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending: dict[Future, Paper | LazyPaper] = {}
+            for paper in papers:
+                pending[executor.submit(self, paper)] = paper
+                if len(pending) >= 2 * max_workers:
+                    yield from collect_results(pending, ordered)
+
+            while pending:
+                yield from collect_results(pending, ordered)
+
+    def compute_keywords(self, paper: Paper | LazyPaper) -> list[str]:
+        """
+        Extracts the keywords from the abstract and summary of the paper.
+
+        Args:
+            paper: The paper to extract the keywords from.
+
+        Returns:
+            list[str]: The keywords.
+        """
+        if not self.abstract_first:
+            summary = self.summarizer(paper, chunk_size=self.chunk_size)
+            return self.extract_keywords(paper.abstract, summary)
+
+        reason = self.abstract_shortcoming(paper.abstract)
+        if reason is None:
+            keywords = self.extract_keywords(paper.abstract, NO_SUMMARY)
+            if len(keywords) >= self.min_keywords:
+                self.record_path(None)
+                return keywords
+            reason = "few_keywords"
+
+        self.record_path(reason)
+        summary = self.summarizer(paper, chunk_size=self.chunk_size)
+        return self.extract_keywords(paper.abstract, summary)
+
+    def abstract_shortcoming(self, abstract: str) -> str | None:
+        """
+        Returns why the abstract alone is not enough to extract keywords.
+
+        Args:
+            abstract: The abstract of the paper.
+
+        Returns:
+            (str | None): The reason, or None if the abstract is enough.
+        """
+        if not abstract.strip():
+            return "no_abstract"
+        if len(abstract.split()) < self.min_abstract_words:
+            return "short_abstract"
+
+        return None
+
+    def record_path(self, escalation_reason: str | None) -> None:
+        """
+        Records whether a paper took the abstract-only path or escalated to a summary.
+
+        Args:
+            escalation_reason: The reason of the escalation, or None for the abstract-only path.
+
+        Returns:
+            None
+        """
+        with self.stats_lock:
+            if escalation_reason is None:
+                self.fast_paths += 1
+            else:
+                self.escalations[escalation_reason] += 1
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the number of papers served from the abstract alone
+        and the number of escalations by reason.
+
+        Args:
+            None
+
+        Returns:
+            (dict[str, int]): The statistics.
+        """
+        with self.stats_lock:
+            return {"fast_paths": self.fast_paths, **self.escalations}
+
+    def report(self) -> str:
+        """
+        Returns a short report of the abstract-first statistics.
+
+        Args:
+            None
+
+        Returns:
+            (str): The report.
+        """
+        stats = self.stats()
+        fast_paths = stats.pop("fast_paths")
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in stats.items())
+        return (
+            f"Keywords: {fast_paths} papers from the abstract alone, "
+            f"{sum(stats.values())} escalated to a summary"
+            + (f" ({reasons})." if reasons else ".")
+        )
+
+    def keywords_version(self, paper: Paper | LazyPaper) -> str:
+        """
+        Returns the version of the keywords of the paper made with the current settings.
+
+        Args:
+            paper: The paper.
+
+        Returns:
+            (str): The version.
+        """
+        return artifact_version(
+            self.llm,
+            extract_keywords_prompt.template,
+            abstract=paper.abstract,
+            summary=self.summarizer.summary_version(self.chunk_size),
+            abstract_first=self.abstract_first,
+            min_abstract_words=self.min_abstract_words,
+            min_keywords=self.min_keywords,
+        )
+
     def extract_keywords(self, abstract: str, summary: str) -> list[str]:
         """
         Extracts the keywords from the paper.
@@ -52,9 +261,37 @@ class KeywordsExtractor:
             }
         )
 
-        try:
-            keywords = json.loads(keywords_json)["keywords"]
-        except json.JSONDecodeError:
-            keywords = []
+        data = self.json_parser.parse(keywords_json, schema=KEYWORDS_JSON_SCHEMA)
+        if isinstance(data, dict):
+            data = data.get("keywords")
+        if not isinstance(data, list):
+            return []
 
-        return keywords
+        return [keyword for keyword in data if isinstance(keyword, str)]
+
+
+def collect_results(
+    pending: dict[Future, Paper | LazyPaper],
+    ordered: bool,
+) -> Iterator[KeywordsResult]:
+    """
+    Waits for the next finished extractions and removes them from the pending ones.
+
+    Args:
+        pending: The pending extractions and their papers.
+        ordered: Whether to wait for the oldest extraction or for any of them.
+
+    Returns:
+        (Iterator[KeywordsResult]): The results of the finished extractions.
+    """
+    if ordered:
+        done = [next(iter(pending))]
+    else:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+    for future in done:
+        paper = pending.pop(future)
+        try:
+            yield KeywordsResult(paper=paper, keywords=future.result(), error=None)
+        except Exception as error:
+            yield KeywordsResult(paper=paper, keywords=[], error=error)
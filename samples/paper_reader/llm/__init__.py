@@ -0,0 +1,24 @@
+from common.cache import SQLiteLRUCache, without_cache
+
+from paper_reader.llm.json_parser import SalvagingJSONParser, salvage_json
+from paper_reader.llm.tokens import estimate_tokens
+from paper_reader.llm.governor import (
+    BATCH,
+    INTERACTIVE,
+    GovernedChatModel,
+    LLMGovernor,
+    with_priority,
+)
+
+__all__ = [
+    "BATCH",
+    "INTERACTIVE",
+    "GovernedChatModel",
+    "LLMGovernor",
+    "SalvagingJSONParser",
+    "SQLiteLRUCache",
+    "estimate_tokens",
+    "salvage_json",
+    "with_priority",
+    "without_cache",
+]
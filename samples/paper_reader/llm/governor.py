@@ -0,0 +1,343 @@
+import copy
+import time
+import heapq
+import hashlib
+import itertools
+import threading
+
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any
+
+from pydantic import ConfigDict
+from langchain_core.callbacks import CallbackManager, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessageChunk, BaseMessage, BaseMessageChunk
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from paper_reader.llm.tokens import estimate_tokens, message_text
+
+
+INTERACTIVE = 0
+BATCH = 10
+
+
+class LLMGovernor:
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        tokens_per_minute: int | None = None,
+        tokenizer: Callable[[str], int] = estimate_tokens,
+    ) -> None:
+        """
+        Initializes the LLM governor.
+        The governor is shared by every governed LLM talking to the same upstream model.
+        It bounds the number of requests in flight, the prompt tokens sent per minute,
+        serves waiting requests by priority and coalesces identical concurrent requests.
+
+        Args:
+            max_concurrency: The maximum number of upstream requests in flight.
+            tokens_per_minute: The maximum number of prompt tokens sent per minute, if any.
+            tokenizer: The function counting the prompt tokens. By default tokens are
+                estimated from the text length, which needs no tokenizer download.
+
+        Returns:
+            None
+        """
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.tokenizer = tokenizer
+
+        self.condition = threading.Condition()
+        self.waiting: list[tuple[int, int]] = []
+        self.tickets = itertools.count()
+        self.running = 0
+        self.sent_tokens: deque[tuple[float, int]] = deque()
+        self.in_flight: dict[str, Future] = {}
+
+        self.requests = 0
+        self.coalesced = 0
+
+    def run(self, key: str, priority: int, tokens: int, call: Callable[[], Any]) -> Any:
+        """
+        Runs the upstream call, or waits for the identical call already in flight.
+
+        Args:
+            key: The key identifying identical requests.
+            priority: The priority of the request, lower is served first.
+            tokens: The number of prompt tokens of the request.
+            call: The upstream call.
+
+        Returns:
+            (Any): The result of the call.
+        """
+        with self.condition:
+            self.requests += 1
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return copy.deepcopy(future.result())
+
+        try:
+            with self.slot(priority, tokens):
+                result = call()
+            future.set_result(result)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self.condition:
+                del self.in_flight[key]
+
+        return result
+
+    @contextmanager
+    def slot(self, priority: int, tokens: int = 0) -> Iterator[None]:
+        """
+        Waits until the request is the most urgent one, a concurrency slot
+        is free and the token budget allows it, then holds the slot.
+
+        Args:
+            priority: The priority of the request, lower is served first.
+            tokens: The number of prompt tokens of the request.
+
+        Returns:
+            (Iterator[None]): The context holding the slot.
+        """
+        ticket = (priority, next(self.tickets))
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            while True:
+                if self.waiting[0] == ticket and self.running < self.max_concurrency:
+                    delay = self.rate_delay(tokens)
+                    if delay <= 0:
+                        break
+                    self.condition.wait(timeout=delay)
+                else:
+                    self.condition.wait()
+
+            heapq.heappop(self.waiting)
+            self.running += 1
+            if tokens:
+                self.sent_tokens.append((time.monotonic(), tokens))
+            self.condition.notify_all()
+
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.running -= 1
+                self.condition.notify_all()
+
+    def rate_delay(self, tokens: int) -> float:
+        """
+        Returns how long a request must wait to stay in the token budget.
+        Must be called while holding the condition.
+
+        Args:
+            tokens: The number of prompt tokens of the request.
+
+        Returns:
+            (float): The delay in seconds, zero or less if the request can be sent.
+        """
+        if self.tokens_per_minute is None or tokens == 0:
+            return 0.0
+
+        now = time.monotonic()
+        while self.sent_tokens and now - self.sent_tokens[0][0] >= 60:
+            self.sent_tokens.popleft()
+
+        sent = sum(count for _, count in self.sent_tokens)
+        if not self.sent_tokens or sent + tokens <= self.tokens_per_minute:
+            return 0.0
+
+        return 60 - (now - self.sent_tokens[0][0])
+
+
+class GovernedChatModel(BaseChatModel):
+    """
+    A chat model sending every request of the wrapped model through a shared governor.
+    It can be passed to every component that accepts an LLM.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    llm: BaseChatModel
+    governor: LLMGovernor
+    priority: int = BATCH
+
+    @property
+    def _llm_type(self) -> str:
+        return f"governed-{self.llm._llm_type}"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return self.llm._identifying_params
+
+    def get_num_tokens(self, text: str) -> int:
+        return self.llm.get_num_tokens(text)
+
+    def get_num_tokens_from_messages(self, messages: list[BaseMessage], *args, **kwargs) -> int:
+        return self.llm.get_num_tokens_from_messages(messages, *args, **kwargs)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        Generates the response through the governor.
+        Identical requests in flight at the same time share one upstream call.
+
+        Args:
+            messages: The prompt messages.
+            stop: The stop words.
+            run_manager: The callback manager of the run.
+            kwargs: The generation params.
+
+        Returns:
+            (ChatResult): The response.
+        """
+
+        callbacks = child_callbacks(run_manager)
+
+        def call() -> ChatResult:
+            result = self.llm.generate([messages], stop=stop, callbacks=callbacks, **kwargs)
+            return ChatResult(
+                generations=result.generations[0],
+                llm_output=result.llm_output,
+            )
+
+        return self.governor.run(
+            key=self.request_key(messages, stop, **kwargs),
+            priority=self.priority,
+            tokens=self.count_prompt_tokens(messages),
+            call=call,
+        )
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        Streams the response while holding a governor slot.
+        A wrapped LLM that does not stream yields its whole response as one chunk.
+
+        Args:
+            messages: The prompt messages.
+            stop: The stop words.
+            run_manager: The callback manager of the run.
+            kwargs: The generation params.
+
+        Returns:
+            (Iterator[ChatGenerationChunk]): The response chunks.
+        """
+        config = {"callbacks": child_callbacks(run_manager)}
+        with self.governor.slot(self.priority, self.count_prompt_tokens(messages)):
+            for message in self.llm.stream(messages, config=config, stop=stop, **kwargs):
+                yield ChatGenerationChunk(message=as_chunk(message))
+
+    def request_key(self, messages: list[BaseMessage], stop: list[str] | None, **kwargs: Any) -> str:
+        """
+        Returns the key identifying identical requests.
+
+        Args:
+            messages: The prompt messages.
+            stop: The stop words.
+            kwargs: The generation params.
+
+        Returns:
+            (str): The hex digest.
+        """
+        llm_string = self.llm._get_llm_string(stop=stop, **kwargs)
+        return hashlib.sha256(f"{llm_string}\0{dumps(messages)}".encode()).hexdigest()
+
+    def count_prompt_tokens(self, messages: list[BaseMessage]) -> int:
+        """
+        Counts the prompt tokens if the governor has a token budget.
+
+        Args:
+            messages: The prompt messages.
+
+        Returns:
+            (int): The number of tokens, zero if there is no budget.
+        """
+        if self.governor.tokens_per_minute is None:
+            return 0
+
+        return sum(self.governor.tokenizer(message_text(message)) for message in messages)
+
+
+def with_priority(llm: BaseChatModel, priority: int) -> BaseChatModel:
+    """
+    Returns the LLM with its requests served at the given priority.
+    LLMs that are not governed are returned unchanged.
+
+    Args:
+        llm: The LLM.
+        priority: The priority, lower is served first.
+
+    Returns:
+        (BaseChatModel): The LLM with the priority.
+    """
+    if not isinstance(llm, GovernedChatModel):
+        return llm
+
+    return llm.model_copy(update={"priority": priority})
+
+
+def child_callbacks(run_manager: CallbackManagerForLLMRun | None) -> CallbackManager | None:
+    """
+    Returns the callbacks of the wrapped LLM call, nested under the governed run
+    so that tracing and callback handlers see it.
+
+    Args:
+        run_manager: The callback manager of the governed run, if any.
+
+    Returns:
+        (CallbackManager | None): The callbacks of the wrapped call.
+    """
+    if run_manager is None:
+        return None
+
+    callbacks = CallbackManager(handlers=[], parent_run_id=run_manager.run_id)
+    callbacks.set_handlers(run_manager.inheritable_handlers)
+    callbacks.add_tags(run_manager.inheritable_tags)
+    callbacks.add_metadata(run_manager.inheritable_metadata)
+    return callbacks
+
+
+def as_chunk(message: BaseMessage) -> BaseMessageChunk:
+    """
+    Returns the message as a message chunk, converting a whole response if needed.
+
+    Args:
+        message: The streamed message.
+
+    Returns:
+        (BaseMessageChunk): The message chunk.
+    """
+    if isinstance(message, BaseMessageChunk):
+        return message
+
+    return AIMessageChunk(
+        content=message.content,
+        additional_kwargs=message.additional_kwargs,
+        response_metadata=message.response_metadata,
+        id=message.id,
+        usage_metadata=getattr(message, "usage_metadata", None),
+    )
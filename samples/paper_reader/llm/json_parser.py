@@ -0,0 +1,238 @@
+import re
+import json
+import threading
+
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.output_parsers.string import StrOutputParser
+
+from paper_reader.prompts import repair_json_prompt
+
+
+CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+CLOSING_AHEAD = re.compile(r"\s*[}\]]")
+CLOSERS = {"{": "}", "[": "]"}
+
+
+class SalvagingJSONParser:
+    def __init__(self, llm: BaseChatModel | None = None, max_salvage_cuts: int = 8) -> None:
+        """
+        Initializes the salvaging JSON parser.
+        Output that is not valid JSON is salvaged locally first and, if that fails,
+        repaired with one cheap LLM call on the malformed output alone.
+
+        Args:
+            llm: The LLM used for repair calls, or None to never call the LLM.
+            max_salvage_cuts: The number of trailing values that may be cut off a truncated output.
+
+        Returns:
+            None
+        """
+        self.llm = llm
+        self.max_salvage_cuts = max_salvage_cuts
+        if llm is not None:
+            self.repair_chain = repair_json_prompt | llm | StrOutputParser()
+
+        self.lock = threading.Lock()
+        self.counters = {
+            "parsed": 0,
+            "salvaged": 0,
+            "repaired": 0,
+            "failed": 0,
+        }
+
+    def parse(self, text: str, schema: str) -> Any | None:
+        """
+        Parses the LLM output as JSON.
+
+        Args:
+            text: The LLM output.
+            schema: The expected schema, shown to the LLM in repair calls.
+
+        Returns:
+            (Any | None): The parsed data or None if the output could not be parsed.
+        """
+        try:
+            data = json.loads(text)
+            self.count("parsed")
+            return data
+        except json.JSONDecodeError:
+            pass
+
+        data = salvage_json(text, self.max_salvage_cuts)
+        if data is not None:
+            self.count("salvaged")
+            return data
+
+        if self.llm is not None:
+            repaired = self.repair_chain.invoke({"text": text, "schema": schema})
+            data = salvage_json(repaired, self.max_salvage_cuts)
+            if data is not None:
+                self.count("repaired")
+                return data
+
+        self.count("failed")
+        return None
+
+    def count(self, counter: str) -> None:
+        """
+        Increments the counter.
+
+        Args:
+            counter: The name of the counter.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.counters[counter] += 1
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns the counters together with the parse failure and repair rates.
+
+        Args:
+            None
+
+        Returns:
+            (dict[str, float]): The statistics.
+        """
+        with self.lock:
+            counters = dict(self.counters)
+
+        total = sum(counters.values())
+        malformed = total - counters["parsed"]
+        return {
+            **counters,
+            "failure_rate": malformed / total if total else 0.0,
+            "repair_rate": counters["repaired"] / malformed if malformed else 0.0,
+        }
+
+    def report(self, name: str = "JSON") -> str:
+        """
+        Returns a short report of the parse statistics.
+
+        Args:
+            name: The name of the parsed output shown in the report.
+
+        Returns:
+            (str): The report.
+        """
+        stats = self.stats()
+        return (
+            f"{name} parsing: {stats['parsed']} parsed, {stats['salvaged']} salvaged, "
+            f"{stats['repaired']} repaired, {stats['failed']} failed "
+            f"(failure rate {stats['failure_rate']:.0%}, repair rate {stats['repair_rate']:.0%})."
+        )
+
+
+def salvage_json(text: str, max_cuts: int = 8) -> Any | None:
+    """
+    Salvages JSON from LLM output with code fences, leading or trailing chatter,
+    trailing commas or a truncated end.
+
+    Args:
+        text: The LLM output.
+        max_cuts: The number of trailing values that may be cut off a truncated output.
+
+    Returns:
+        (Any | None): The salvaged data or None if nothing could be salvaged.
+    """
+    fence = CODE_FENCE.search(text)
+    if fence is not None:
+        text = fence.group(1)
+
+    starts = [idx for idx in (text.find("{"), text.find("[")) if idx != -1]
+    if not starts:
+        return None
+    text = text[min(starts) :]
+
+    for candidate in (text, strip_trailing_commas(text)):
+        try:
+            data, _ = json.JSONDecoder().raw_decode(candidate)
+            return data
+        except json.JSONDecodeError:
+            pass
+
+    text = strip_trailing_commas(text)
+    for _ in range(max_cuts + 1):
+        closed, last_comma = close_json(text)
+        try:
+            return json.loads(strip_trailing_commas(closed))
+        except json.JSONDecodeError:
+            if last_comma is None:
+                return None
+            text = text[:last_comma]
+
+    return None
+
+
+def strip_trailing_commas(text: str) -> str:
+    """
+    Removes the commas right before a closing bracket, leaving the strings untouched.
+
+    Args:
+        text: The JSON text.
+
+    Returns:
+        (str): The text without trailing commas.
+    """
+    kept: list[str] = []
+    in_string = False
+    escaped = False
+    for idx, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "," and CLOSING_AHEAD.match(text, idx + 1):
+            continue
+
+        kept.append(char)
+
+    return "".join(kept)
+
+
+def close_json(text: str) -> tuple[str, int | None]:
+    """
+    Closes the open string, arrays and objects of a truncated JSON text.
+
+    Args:
+        text: The truncated JSON text.
+
+    Returns:
+        (tuple[str, int | None]): The closed text and the position of the last
+            comma outside of strings, where the text can be cut if closing is not enough.
+    """
+    stack: list[str] = []
+    in_string = False
+    escaped = False
+    last_comma = None
+    for idx, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in "}]" and stack:
+            stack.pop()
+        elif char == ",":
+            last_comma = idx
+
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",:")
+
+    return text + "".join(reversed(stack)), last_comma
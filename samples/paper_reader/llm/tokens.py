@@ -0,0 +1,33 @@
+from langchain_core.messages import BaseMessage
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the tokens of the text, at about four characters per token.
+
+    Args:
+        text: The text to count.
+
+    Returns:
+        (int): The estimated number of tokens.
+    """
+    return len(text) // 4
+
+
+def message_text(message: BaseMessage) -> str:
+    """
+    Returns the text of the message, joining the text blocks of multimodal content.
+
+    Args:
+        message: The message.
+
+    Returns:
+        (str): The text.
+    """
+    if isinstance(message.content, str):
+        return message.content
+
+    return "".join(
+        block if isinstance(block, str) else str(block.get("text", ""))
+        for block in message.content
+    )
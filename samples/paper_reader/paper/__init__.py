@@ -1,8 +1,22 @@
-from paper_reader.paper.paper import Paper, load_paper
+from common.pages import PagePruner
+from common.page_cache import PageCache, PageCacheStats
+
+from paper_reader.paper.paper import Paper, LazyPaper, load_paper, load_lazy_paper
+from paper_reader.paper.chunks import ChunkView, PaperChunks
+from paper_reader.paper.splits import SplitCache, split_cache
 from paper_reader.paper.info_exractor import PaperInfoExtractor
 
 __all__ = [
+    "ChunkView",
     "Paper",
+    "LazyPaper",
+    "PageCache",
+    "PageCacheStats",
+    "PagePruner",
+    "PaperChunks",
     "PaperInfoExtractor",
+    "SplitCache",
     "load_paper",
+    "load_lazy_paper",
+    "split_cache",
 ]
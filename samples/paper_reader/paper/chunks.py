@@ -0,0 +1,213 @@
+from typing import Any, NamedTuple
+from collections.abc import Iterator
+
+from langchain_core.documents.base import Document
+from langchain_text_splitters import TextSplitter
+
+
+class ChunkView(NamedTuple):
+    paper_id: str
+    page_index: int
+    start: int
+    end: int
+
+
+class PaperChunks:
+    def __init__(
+        self,
+        paper_id: str,
+        pages: list[Document],
+        views: list[ChunkView],
+    ) -> None:
+        """
+        Initializes the chunks of a paper.
+        Chunks are kept as offsets into the shared page texts and the metadata
+        common to every page is interned once per paper, so no text or metadata
+        is copied until the chunks are materialized as documents.
+
+        Args:
+            paper_id: The id of the paper the chunks belong to.
+            pages: The pages of the paper.
+            views: The chunks as offsets into the pages.
+
+        Returns:
+            None
+        """
+        self.paper_id = paper_id
+        self.texts = [page.page_content for page in pages]
+        self.metadata, self.page_metadata = intern_metadata(pages)
+        self.views = views
+
+    def __len__(self) -> int:
+        return len(self.views)
+
+    def text(self, view: ChunkView) -> str:
+        """
+        Returns the text of the chunk.
+
+        Args:
+            view: The chunk.
+
+        Returns:
+            (str): The text.
+        """
+        return self.texts[view.page_index][view.start : view.end]
+
+    def iter_texts(self) -> Iterator[str]:
+        """
+        Iterates over the chunk texts, slicing each one only when it is reached.
+
+        Args:
+            None
+
+        Returns:
+            (Iterator[str]): The texts.
+        """
+        for view in self.views:
+            yield self.text(view)
+
+    def document(self, view: ChunkView) -> Document:
+        """
+        Materializes the chunk as a document.
+
+        Args:
+            view: The chunk.
+
+        Returns:
+            (Document): The document, with the same metadata the text splitter would give it.
+        """
+        return Document(
+            page_content=self.text(view),
+            metadata={
+                **self.metadata,
+                **self.page_metadata[view.page_index],
+                "start_index": view.start,
+            },
+        )
+
+    def documents(self) -> list[Document]:
+        """
+        Materializes every chunk as a document.
+
+        Args:
+            None
+
+        Returns:
+            (list[Document]): The documents.
+        """
+        return [self.document(view) for view in self.views]
+
+    def size(self) -> int:
+        """
+        Returns the number of characters of the page texts the chunks keep alive.
+
+        Args:
+            None
+
+        Returns:
+            (int): The number of characters.
+        """
+        return sum(len(text) for text in self.texts)
+
+
+def chunk_pages(
+    paper_id: str,
+    pages: list[Document],
+    splitter: TextSplitter,
+) -> PaperChunks:
+    """
+    Splits the pages into chunk views.
+    The splitter makes the chunk texts, which are only used to find their
+    offsets in the page and dropped right away. Each chunk is searched from
+    the start of the previous one, which holds whatever unit the splitter
+    measures the chunk overlap in.
+
+    Args:
+        paper_id: The id of the paper.
+        pages: The pages of the paper.
+        splitter: The text splitter.
+
+    Returns:
+        (PaperChunks): The chunks.
+    """
+    views = []
+    for page_index, page in enumerate(pages):
+        text = page.page_content
+        index = 0
+        for chunk in splitter.split_text(text):
+            index = text.find(chunk, index)
+            if index == -1:
+                raise ValueError(f"Chunk not found in page {page_index} of paper {paper_id}.")
+
+            views.append(
+                ChunkView(
+                    paper_id=paper_id,
+                    page_index=page_index,
+                    start=index,
+                    end=index + len(chunk),
+                )
+            )
+
+    return PaperChunks(paper_id=paper_id, pages=pages, views=views)
+
+
+def join_pages(pages: list[Document], separator: str = "\n\n") -> list[Document]:
+    """
+    Joins the pages into a single page, so chunks can span page boundaries.
+    The joined page keeps the metadata shared by every page and the offsets
+    at which each page starts, so a chunk can be traced back to its pages.
+
+    Args:
+        pages: The pages of the paper.
+        separator: The text put between two pages.
+
+    Returns:
+        (list[Document]): The joined page, or no page if there are none.
+    """
+    if not pages:
+        return []
+
+    shared, _ = intern_metadata(pages)
+    page_starts = []
+    start = 0
+    for page in pages:
+        page_starts.append(start)
+        start += len(page.page_content) + len(separator)
+
+    return [
+        Document(
+            page_content=separator.join(page.page_content for page in pages),
+            metadata={**shared, "page_starts": page_starts},
+        )
+    ]
+
+
+def intern_metadata(pages: list[Document]) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """
+    Splits the page metadata into the entries shared by every page,
+    kept once, and the entries specific to each page.
+
+    Args:
+        pages: The pages of the paper.
+
+    Returns:
+        (tuple[dict[str, Any], list[dict[str, Any]]]): The shared metadata
+            and the metadata of each page.
+    """
+    if not pages:
+        return {}, []
+
+    shared = dict(pages[0].metadata)
+    for page in pages[1:]:
+        shared = {
+            key: value
+            for key, value in shared.items()
+            if key in page.metadata and page.metadata[key] == value
+        }
+
+    page_metadata = [
+        {key: value for key, value in page.metadata.items() if key not in shared}
+        for page in pages
+    ]
+
+    return shared, page_metadata
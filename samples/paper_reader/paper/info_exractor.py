@@ -1,43 +1,93 @@
-import json
+import asyncio
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.documents.base import Document
+from langchain_core.runnables import RunnableLambda, RunnableParallel
+
+from common.pages import rank_abstract_candidates
 
 from paper_reader.paper import Paper
 from paper_reader.summarize import MapReduceSummarizer
+from paper_reader.artifacts import ArtifactStore, artifact_version
+from paper_reader.llm import SalvagingJSONParser, without_cache
 from paper_reader.prompts import (
     extract_paper_info_prompt,
     extarct_abstract_prompt,
     is_there_abstract_prompt,
+    extract_paper_metadata_prompt,
+    PAPER_INFO_JSON_SCHEMA,
+    PAPER_METADATA_JSON_SCHEMA,
 )
 
 
 class PaperInfoExtractor:
-    def __init__(self, llm: BaseChatModel) -> None:
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        artifact_store: ArtifactStore | None = None,
+        use_cache: bool = True,
+        abstract_candidates: int = 2,
+        fallback_pages: int = 3,
+        combined: bool = False,
+        combined_pages: int = 2,
+    ) -> None:
         """
         Initializes the paper info extractor.
 
         Args:
             llm: The LLM to use.
+            artifact_store: The store consulted for the info of already loaded papers.
+            use_cache: Whether the chains may use the LLM response cache.
+            abstract_candidates: The number of likely abstract pages checked by the LLM.
+            fallback_pages: The number of leading pages summarized when no abstract is found.
+            combined: Whether to extract the info and abstract with a single call first
+                and use the separate calls only when the single call falls short.
+            combined_pages: The number of leading pages sent in the single call.
 
         Returns:
             None
         """
         self.llm = llm
+        self.artifact_store = artifact_store
+        self.use_cache = use_cache
+        self.abstract_candidates = abstract_candidates
+        self.fallback_pages = fallback_pages
+        self.combined = combined
+        self.combined_pages = combined_pages
+
+        chain_llm = self.llm if use_cache else without_cache(self.llm)
         self.is_there_abstract_chain = (
-            is_there_abstract_prompt | self.llm | StrOutputParser()
+            is_there_abstract_prompt | chain_llm | StrOutputParser()
         )
         self.extract_paper_info_chain = (
-            extract_paper_info_prompt | self.llm | StrOutputParser()
+            extract_paper_info_prompt | chain_llm | StrOutputParser()
         )
         self.extract_abstract_chain = (
-            extarct_abstract_prompt | self.llm | StrOutputParser()
+            extarct_abstract_prompt | chain_llm | StrOutputParser()
+        )
+        self.extract_paper_metadata_chain = (
+            extract_paper_metadata_prompt | chain_llm | StrOutputParser()
+        )
+        self.json_parser = SalvagingJSONParser(llm=chain_llm)
+        self.fallback_summarizer = MapReduceSummarizer(
+            llm=self.llm,
+            artifact_store=self.artifact_store,
+            use_cache=self.use_cache,
+        )
+        self.info_and_abstract_chain = RunnableParallel(
+            info=RunnableLambda(lambda pages: {"page": pages[0].page_content})
+            | self.extract_paper_info_chain,
+            abstract=RunnableLambda(self.extarct_abstract, afunc=self.aextarct_abstract),
         )
 
     def extract_info(self, pages: list[Document]) -> dict:
         """
         Extracts the information from the paper.
+        The metadata and the abstract are extracted concurrently.
+        In combined mode a single call is tried first. If it says the pages
+        have no abstract, the leading pages are summarized right away, and the
+        abstract pages are only checked when it gave no usable abstract field.
 
         Args:
             paper: The paper to extract the information from.
@@ -45,38 +95,182 @@ class PaperInfoExtractor:
         Returns:
             (dict[str, str]): The information.
         """
-        first_page = pages[0]
-        info_str = self.extract_paper_info_chain.invoke(
-            {
-                "page": first_page,
-            }
+        info = self.cached_info(pages)
+        if info is not None:
+            return info
+
+        info = self.combined_info(pages) if self.combined else None
+        if info is None:
+            result = self.info_and_abstract_chain.invoke(pages)
+            info = self.parse_info(result["info"])
+            info["abstract"] = result["abstract"]
+        elif info["abstract"] is None:
+            info["abstract"] = self.fallback_summarizer(self.fallback_paper(pages))
+        elif not info["abstract"]:
+            info["abstract"] = self.extarct_abstract(pages)
+
+        self.store_info(pages, info)
+
+        return info
+
+    async def aextract_info(self, pages: list[Document]) -> dict:
+        """
+        Extracts the information from the paper asynchronously.
+        The metadata and the abstract are extracted concurrently.
+
+        Args:
+            pages: The pages of the paper.
+
+        Returns:
+            (dict[str, str]): The information.
+        """
+        info = self.cached_info(pages)
+        if info is not None:
+            return info
+
+        info = await self.acombined_info(pages) if self.combined else None
+        if info is None:
+            result = await self.info_and_abstract_chain.ainvoke(pages)
+            info = await asyncio.to_thread(self.parse_info, result["info"])
+            info["abstract"] = result["abstract"]
+        elif info["abstract"] is None:
+            info["abstract"] = await self.fallback_summarizer.acall(self.fallback_paper(pages))
+        elif not info["abstract"]:
+            info["abstract"] = await self.aextarct_abstract(pages)
+
+        self.store_info(pages, info)
+
+        return info
+
+    def combined_info(self, pages: list[Document]) -> dict | None:
+        """
+        Extracts the info and abstract of the paper with a single call.
+
+        Args:
+            pages: The pages of the paper.
+
+        Returns:
+            (dict | None): The information, with a None abstract if the pages have none,
+                or None if the output could not be parsed.
+        """
+        metadata_str = self.extract_paper_metadata_chain.invoke(
+            {"pages": self.combined_text(pages)}
         )
 
-        try:
-            info = json.loads(info_str)
-        except json.JSONDecodeError:
+        return self.parse_metadata(metadata_str)
+
+    async def acombined_info(self, pages: list[Document]) -> dict | None:
+        """
+        Extracts the info and abstract of the paper with a single asynchronous call.
+
+        Args:
+            pages: The pages of the paper.
+
+        Returns:
+            (dict | None): The information, with a None abstract if the pages have none,
+                or None if the output could not be parsed.
+        """
+        metadata_str = await self.extract_paper_metadata_chain.ainvoke(
+            {"pages": self.combined_text(pages)}
+        )
+
+        return await asyncio.to_thread(self.parse_metadata, metadata_str)
+
+    def combined_text(self, pages: list[Document]) -> str:
+        """
+        Returns the text of the leading pages sent in the single call.
+
+        Args:
+            pages: The pages of the paper.
+
+        Returns:
+            (str): The text.
+        """
+        return "\n\n".join(page.page_content for page in pages[: self.combined_pages])
+
+    def parse_metadata(self, metadata_str: str) -> dict | None:
+        """
+        Parses the info and abstract extracted by the single call.
+
+        Args:
+            metadata_str: The LLM output.
+
+        Returns:
+            (dict | None): The information or None if the output could not be parsed.
+                The abstract is None if the call explicitly found none, and empty
+                if the field is missing or not a string.
+        """
+        metadata = self.json_parser.parse(metadata_str, schema=PAPER_METADATA_JSON_SCHEMA)
+        if not isinstance(metadata, dict):
+            return None
+
+        abstract = metadata.get("abstract", "")
+        return {
+            "title": metadata.get("title") or "",
+            "authors": metadata.get("authors") or [],
+            "year": metadata.get("year") or 0,
+            "abstract": abstract if abstract is None or isinstance(abstract, str) else "",
+        }
+
+    def parse_info(self, info_str: str) -> dict:
+        """
+        Parses the paper info extracted by the LLM.
+
+        Args:
+            info_str: The LLM output.
+
+        Returns:
+            (dict): The title, authors and year of the paper.
+        """
+        info = self.json_parser.parse(info_str, schema=PAPER_INFO_JSON_SCHEMA)
+        if not isinstance(info, dict):
             print(f"Error parsing paper info: {info_str}")
-            info = {
-                "title": "",
-                "authors": [],
-                "year": 0,
-            }
-
-        if info["year"] is None:
-            info["year"] = 0
-        if info["authors"] is None:
-            info["authors"] = []
-        if info["title"] is None:
-            info["title"] = ""
-
-        abstract = self.extarct_abstract(pages)
-        info["abstract"] = abstract
+            info = {}
 
-        return info
+        return {
+            "title": info.get("title") or "",
+            "authors": info.get("authors") or [],
+            "year": info.get("year") or 0,
+        }
+
+    def cached_info(self, pages: list[Document]) -> dict | None:
+        """
+        Returns the stored info of the paper.
+
+        Args:
+            pages: The pages of the paper.
+
+        Returns:
+            (dict | None): The info or None if there is no store or no stored info.
+        """
+        if self.artifact_store is None:
+            return None
+
+        return self.artifact_store.get(pages, "info", self.info_version())
+
+    def store_info(self, pages: list[Document], info: dict) -> None:
+        """
+        Stores the info of the paper if there is a store and the extraction succeeded.
+
+        Args:
+            pages: The pages of the paper.
+            info: The info.
+
+        Returns:
+            None
+        """
+        if self.artifact_store is None:
+            return
+        if not info["title"] and not info["abstract"]:
+            return
+
+        self.artifact_store.put(pages, "info", self.info_version(), info)
 
     def extarct_abstract(self, pages: list[Document]) -> str:
         """
         Extracts the abstract from the paper.
+        Only the most likely abstract pages are checked by the LLM, all at once,
+        and if none holds the abstract the leading pages are summarized instead.
 
         Args:
             paper: The paper to extract the abstract from.
@@ -84,28 +278,83 @@ class PaperInfoExtractor:
         Returns:
             (str): The abstract.
         """
-        for page in pages:
-            is_there_abstract: str = self.is_there_abstract_chain.invoke(
-                {
-                    "text": page.page_content,
-                }
-            )
+        candidates = rank_abstract_candidates(pages, top_k=self.abstract_candidates)
+        answers: list[str] = self.is_there_abstract_chain.batch(
+            [{"text": pages[idx].page_content} for idx in candidates]
+        )
 
+        for idx, is_there_abstract in zip(candidates, answers):
             if "true" in is_there_abstract.casefold():
                 return self.extract_abstract_chain.invoke(
                     {
-                        "page": page.page_content,
+                        "page": pages[idx].page_content,
+                    }
+                )
+
+        return self.fallback_summarizer(self.fallback_paper(pages))
+
+    async def aextarct_abstract(self, pages: list[Document]) -> str:
+        """
+        Extracts the abstract from the paper asynchronously.
+
+        Args:
+            pages: The pages of the paper.
+
+        Returns:
+            (str): The abstract.
+        """
+        candidates = rank_abstract_candidates(pages, top_k=self.abstract_candidates)
+        answers: list[str] = await self.is_there_abstract_chain.abatch(
+            [{"text": pages[idx].page_content} for idx in candidates]
+        )
+
+        for idx, is_there_abstract in zip(candidates, answers):
+            if "true" in is_there_abstract.casefold():
+                return await self.extract_abstract_chain.ainvoke(
+                    {
+                        "page": pages[idx].page_content,
                     }
                 )
 
-        summarizer = MapReduceSummarizer(llm=self.llm)
-        return summarizer(
-            Paper(
-                title="",
-                authors=[],
-                year=0,
-                url="",
-                abstract="",
-                pages=pages,
-            )
+        return await self.fallback_summarizer.acall(self.fallback_paper(pages))
+
+    def fallback_paper(self, pages: list[Document]) -> Paper:
+        """
+        Returns the leading pages summarized when no abstract is found.
+
+        Args:
+            pages: The pages of the paper.
+
+        Returns:
+            (Paper): The paper made of the leading pages.
+        """
+        return Paper(
+            title="",
+            authors=[],
+            year=0,
+            url="",
+            abstract="",
+            pages=pages[: self.fallback_pages],
+        )
+
+    def info_version(self) -> str:
+        """
+        Returns the version of the info made with the current prompts and LLM.
+
+        Args:
+            None
+
+        Returns:
+            (str): The version.
+        """
+        return artifact_version(
+            self.llm,
+            extract_paper_info_prompt.template,
+            is_there_abstract_prompt.template,
+            extarct_abstract_prompt.template,
+            extract_paper_metadata_prompt.template,
+            abstract_candidates=self.abstract_candidates,
+            fallback_pages=self.fallback_pages,
+            combined=self.combined,
+            combined_pages=self.combined_pages,
         )
@@ -1,9 +1,15 @@
 from pathlib import Path
 from typing import NamedTuple
+from collections.abc import Callable, Iterable, Iterator
 
 from langchain_core.documents.base import Document
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from common.pages import PagePruner
+from common.page_cache import PageCache
+
+from paper_reader.paper.chunks import PaperChunks, join_pages
+from paper_reader.paper.splits import split_cache
 
 
 class Paper(NamedTuple):
@@ -18,6 +24,7 @@ class Paper(NamedTuple):
         self,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        length_function: Callable[[str], int] = len,
     ) -> list[Document]:
         """
         Splits the paper into pages.
@@ -25,22 +32,180 @@ class Paper(NamedTuple):
         Args:
             chunk_size: The size of the chunk.
             chunk_overlap: The overlap of the chunk.
+            length_function: The function measuring the size of a text, characters by default.
 
         Returns:
             (list[Document]): The list of spited contents.
         """
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            add_start_index=True,
-        )
+        return split_pages(self.pages, chunk_size, chunk_overlap, length_function)
+
+    def chunks(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        length_function: Callable[[str], int] = len,
+        across_pages: bool = False,
+    ) -> PaperChunks:
+        """
+        Splits the paper into chunk views over its pages, without copying any text.
+
+        Args:
+            chunk_size: The size of the chunk.
+            chunk_overlap: The overlap of the chunk.
+            length_function: The function measuring the size of a text, characters by default.
+            across_pages: Whether chunks may span page boundaries, so that neighbouring
+                pages are packed into one chunk up to `chunk_size`.
+
+        Returns:
+            (PaperChunks): The chunks.
+        """
+        pages = join_pages(self.pages) if across_pages else self.pages
+        return split_cache.chunks(pages, chunk_size, chunk_overlap, length_function)
+
+
+class LazyPaper:
+    def __init__(
+        self,
+        title: str,
+        authors: list[str],
+        year: int,
+        abstract: str,
+        url: str,
+        page_loader: Callable[[], Iterable[Document]],
+        pages: list[Document] | None = None,
+    ) -> None:
+        """
+        Initializes the lazy paper.
+        It has the fields of `Paper`, but its pages are only loaded when they are
+        used and can be released afterwards, so many papers fit in bounded memory.
+
+        Args:
+            title: The title of the paper.
+            authors: The authors of the paper.
+            year: The year of the paper.
+            abstract: The abstract of the paper.
+            url: The url of the paper.
+            page_loader: The function loading the pages of the paper.
+            pages: The already loaded pages of the paper, if any.
+
+        Returns:
+            None
+        """
+        self.title = title
+        self.authors = authors
+        self.year = year
+        self.abstract = abstract
+        self.url = url
+        self.page_loader = page_loader
+        self.loaded_pages = pages
+
+    @property
+    def pages(self) -> list[Document]:
+        """
+        Returns the pages of the paper, loading them if they are not loaded.
+
+        Returns:
+            (list[Document]): The pages.
+        """
+        if self.loaded_pages is None:
+            self.loaded_pages = list(self.page_loader())
 
-        splits = text_splitter.split_documents(self.pages)
+        return self.loaded_pages
 
-        return splits
+    def iter_pages(self) -> Iterator[Document]:
+        """
+        Iterates over the pages without keeping them loaded afterwards.
+
+        Args:
+            None
+
+        Returns:
+            (Iterator[Document]): The pages.
+        """
+        if self.loaded_pages is not None:
+            yield from self.loaded_pages
+        else:
+            yield from self.page_loader()
+
+    def release(self) -> None:
+        """
+        Releases the loaded pages, they are loaded again when used.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.loaded_pages = None
+
+    def split(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        length_function: Callable[[str], int] = len,
+    ) -> list[Document]:
+        """
+        Splits the paper into pages.
 
+        Args:
+            chunk_size: The size of the chunk.
+            chunk_overlap: The overlap of the chunk.
+            length_function: The function measuring the size of a text, characters by default.
+
+        Returns:
+            (list[Document]): The list of spited contents.
+        """
+        return split_pages(self.pages, chunk_size, chunk_overlap, length_function)
 
-def make_paper_metadata(paper: Paper) -> dict:
+    def chunks(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        length_function: Callable[[str], int] = len,
+        across_pages: bool = False,
+    ) -> PaperChunks:
+        """
+        Splits the paper into chunk views over its pages, without copying any text.
+
+        Args:
+            chunk_size: The size of the chunk.
+            chunk_overlap: The overlap of the chunk.
+            length_function: The function measuring the size of a text, characters by default.
+            across_pages: Whether chunks may span page boundaries, so that neighbouring
+                pages are packed into one chunk up to `chunk_size`.
+
+        Returns:
+            (PaperChunks): The chunks.
+        """
+        pages = join_pages(self.pages) if across_pages else self.pages
+        return split_cache.chunks(pages, chunk_size, chunk_overlap, length_function)
+
+
+def split_pages(
+    pages: list[Document],
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int],
+) -> list[Document]:
+    """
+    Splits the pages into chunks.
+    Splits are memoized in the shared split cache as chunk views
+    and materialized as new documents on every call.
+
+    Args:
+        pages: The pages to split.
+        chunk_size: The size of the chunk.
+        chunk_overlap: The overlap of the chunk.
+        length_function: The function measuring the size of a text.
+
+    Returns:
+        (list[Document]): The chunks.
+    """
+    return split_cache.split(pages, chunk_size, chunk_overlap, length_function)
+
+
+def make_paper_metadata(paper: Paper | LazyPaper) -> dict:
     """
     Makes the paper metadata.
 
@@ -59,29 +224,40 @@ def make_paper_metadata(paper: Paper) -> dict:
 
 
 def load_paper(
-    paper_path: Path,
+    paper_path: Path | None,
     title: str,
     authors: list[str],
     year: int,
     abstract: str,
     url: str,
+    pruner: PagePruner | None = None,
+    pages: list[Document] | None = None,
 ) -> Paper:
     """
-    Loads the paper from the paper path.
+    Loads the paper from the paper path, or from its already parsed pages.
 
     Args:
-        paper_path: The path to the paper.
+        paper_path: The path to the paper, unused if `pages` is given.
         title: The title of the paper.
         authors: The authors of the paper.
         year: The year of the paper.
         abstract: The abstract of the paper.
         url: The url of the paper.
+        pruner: The pruner dropping reference and boilerplate pages, if any.
+        pages: The already parsed pages of the paper, stamped with the metadata in place.
 
     Returns:
         (Paper): The paper.
     """
-    loader = PyPDFLoader(str(paper_path))
-    docs = loader.load()
+    if pages is not None:
+        docs = pages
+    elif paper_path is not None:
+        docs = PyPDFLoader(str(paper_path)).load()
+    else:
+        raise ValueError("Either the paper path or the pages must be given.")
+
+    if pruner is not None:
+        docs = pruner(docs)
     paper = Paper(
         title=title,
         authors=authors,
@@ -96,3 +272,63 @@ def load_paper(
         page.metadata.update(paper_metadata)
 
     return paper
+
+
+def load_lazy_paper(
+    paper_path: Path,
+    title: str,
+    authors: list[str],
+    year: int,
+    abstract: str,
+    url: str,
+    pruner: PagePruner | None = None,
+    page_cache: PageCache | None = None,
+    pages: list[Document] | None = None,
+) -> LazyPaper:
+    """
+    Loads the paper with pages that are parsed again, or read from the page cache,
+    whenever they are used after being released.
+
+    Args:
+        paper_path: The path to the paper.
+        title: The title of the paper.
+        authors: The authors of the paper.
+        year: The year of the paper.
+        abstract: The abstract of the paper.
+        url: The url of the paper.
+        pruner: The pruner dropping reference and boilerplate pages, if any.
+        page_cache: The cache of parsed pages, if any.
+        pages: The already parsed and pruned pages of the paper, if any.
+
+    Returns:
+        (LazyPaper): The paper.
+    """
+    def load_pages() -> list[Document]:
+        if page_cache is not None:
+            docs = page_cache.load(paper_path)
+        else:
+            docs = PyPDFLoader(str(paper_path)).load()
+
+        if pruner is not None:
+            docs = pruner.select(docs)
+        paper_metadata = make_paper_metadata(paper)
+        for page in docs:
+            page.metadata.update(paper_metadata)
+
+        return docs
+
+    paper = LazyPaper(
+        title=title,
+        authors=authors,
+        year=year,
+        abstract=abstract,
+        url=url,
+        page_loader=load_pages,
+    )
+    if pages is not None:
+        paper_metadata = make_paper_metadata(paper)
+        for page in pages:
+            page.metadata.update(paper_metadata)
+        paper.loaded_pages = pages
+
+    return paper
@@ -0,0 +1,197 @@
+import json
+import hashlib
+import threading
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from langchain_core.documents.base import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from paper_reader.paper.chunks import PaperChunks, chunk_pages
+
+
+class SplitCache:
+    def __init__(
+        self,
+        max_entries: int = 64,
+        max_chars: int = 20_000_000,
+        max_splitters: int = 16,
+    ) -> None:
+        """
+        Initializes the split cache.
+        Splits are cached as chunk views per pages, chunk size, chunk overlap and
+        length function, and the least recently used ones are dropped past `max_entries`
+        entries or `max_chars` characters of page text kept alive. The splitters are
+        reused as well.
+
+        Args:
+            max_entries: The maximum number of cached splits.
+            max_chars: The maximum number of characters of page text kept alive.
+            max_splitters: The maximum number of cached splitters.
+
+        Returns:
+            None
+        """
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.max_splitters = max_splitters
+
+        self.lock = threading.Lock()
+        self.splits: OrderedDict[Hashable, PaperChunks] = OrderedDict()
+        self.splitters: OrderedDict[Hashable, RecursiveCharacterTextSplitter] = OrderedDict()
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    def split(
+        self,
+        pages: list[Document],
+        chunk_size: int,
+        chunk_overlap: int,
+        length_function: Callable[[str], int],
+    ) -> list[Document]:
+        """
+        Returns the chunks of the pages as documents, splitting them only on a cache miss.
+
+        Args:
+            pages: The pages to split.
+            chunk_size: The size of the chunk.
+            chunk_overlap: The overlap of the chunk.
+            length_function: The function measuring the size of a text.
+
+        Returns:
+            (list[Document]): The chunks.
+        """
+        return self.chunks(pages, chunk_size, chunk_overlap, length_function).documents()
+
+    def chunks(
+        self,
+        pages: list[Document],
+        chunk_size: int,
+        chunk_overlap: int,
+        length_function: Callable[[str], int],
+    ) -> PaperChunks:
+        """
+        Returns the chunk views of the pages, splitting them only on a cache miss.
+
+        Args:
+            pages: The pages to split.
+            chunk_size: The size of the chunk.
+            chunk_overlap: The overlap of the chunk.
+            length_function: The function measuring the size of a text.
+
+        Returns:
+            (PaperChunks): The chunks.
+        """
+        paper_id = pages_key(pages)
+        key = (paper_id, chunk_size, chunk_overlap, length_function)
+        with self.lock:
+            chunks = self.splits.get(key)
+            if chunks is not None:
+                self.splits.move_to_end(key)
+                self.hits += 1
+                return chunks
+            self.misses += 1
+
+        splitter = self.splitter(chunk_size, chunk_overlap, length_function)
+        chunks = chunk_pages(paper_id, pages, splitter)
+
+        with self.lock:
+            if key not in self.splits:
+                self.splits[key] = chunks
+                self.chars += chunks.size()
+                self.evict()
+
+        return chunks
+
+    def splitter(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        length_function: Callable[[str], int],
+    ) -> RecursiveCharacterTextSplitter:
+        """
+        Returns the splitter for the params, reusing an existing one if possible.
+
+        Args:
+            chunk_size: The size of the chunk.
+            chunk_overlap: The overlap of the chunk.
+            length_function: The function measuring the size of a text.
+
+        Returns:
+            (RecursiveCharacterTextSplitter): The splitter.
+        """
+        key = (chunk_size, chunk_overlap, length_function)
+        with self.lock:
+            splitter = self.splitters.get(key)
+            if splitter is not None:
+                self.splitters.move_to_end(key)
+                return splitter
+
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=length_function,
+                add_start_index=True,
+            )
+            self.splitters[key] = splitter
+            if len(self.splitters) > self.max_splitters:
+                self.splitters.popitem(last=False)
+
+            return splitter
+
+    def evict(self) -> None:
+        """
+        Drops the least recently used splits until the cache is within its bounds.
+        Must be called while holding the lock.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        while self.splits and (
+            len(self.splits) > self.max_entries or self.chars > self.max_chars
+        ):
+            _, chunks = self.splits.popitem(last=False)
+            self.chars -= chunks.size()
+
+    def clear(self) -> None:
+        """
+        Drops every cached split and splitter.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.splits.clear()
+            self.splitters.clear()
+            self.chars = 0
+
+
+def pages_key(pages: list[Document]) -> str:
+    """
+    Returns the key of the pages, covering their text and metadata.
+
+    Args:
+        pages: The pages.
+
+    Returns:
+        (str): The hex digest.
+    """
+    hasher = hashlib.sha256()
+    for page in pages:
+        hasher.update(page.page_content.encode())
+        hasher.update(b"\0")
+        hasher.update(json.dumps(page.metadata, sort_keys=True, default=str).encode())
+        hasher.update(b"\0")
+
+    return hasher.hexdigest()
+
+
+split_cache = SplitCache()
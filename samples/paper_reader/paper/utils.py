@@ -1,55 +1,175 @@
 from pathlib import Path
+from collections.abc import Iterable, Iterator
 
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.documents.base import Document
 from langchain_community.document_loaders import PyPDFLoader
 
-from paper_reader.paper import Paper, load_paper
+from common.parsing import parse_pdfs
+
+from paper_reader.paper import (
+    Paper,
+    LazyPaper,
+    PageCache,
+    PagePruner,
+    load_paper,
+    load_lazy_paper,
+)
 from paper_reader.paper.info_exractor import PaperInfoExtractor
+from paper_reader.artifacts import ArtifactStore
 
 
-def load_papers_from_path(llm: BaseChatModel, path: Path) -> list[Paper]:
+def load_papers_from_path(
+    llm: BaseChatModel,
+    path: Path,
+    artifact_store: ArtifactStore | None = None,
+    max_workers: int | None = None,
+    page_cache: PageCache | None = None,
+    lazy: bool = False,
+) -> Iterator[Paper | LazyPaper]:
     """
-    Loads the papers from the path.
+    Loads the papers from the path and yields them one by one.
 
     Args:
         llm: The language model.
         path: The path to the papers.
+        artifact_store: The store consulted for the info of already loaded papers.
+        max_workers: The number of processes parsing the PDFs, the number of CPUs by default.
+        page_cache: The cache of parsed pages, if any.
+        lazy: Whether to yield lazy papers whose pages can be released and loaded again.
 
     Returns:
-        (list[Paper]): The papers.
-    """
-    papers = []
-    for file in path.iterdir():
-        if file.suffix == ".pdf":
-            paper = load_paper_from_path(
-                llm=llm,
-                path=file,
+        (Iterator[Paper | LazyPaper]): The papers.
+    """
+    return load_papers_from_paths(
+        llm=llm,
+        paths=[file for file in path.iterdir() if file.suffix == ".pdf"],
+        artifact_store=artifact_store,
+        max_workers=max_workers,
+        page_cache=page_cache,
+        lazy=lazy,
+    )
+
+
+def load_papers_from_paths(
+    llm: BaseChatModel,
+    paths: Iterable[Path],
+    artifact_store: ArtifactStore | None = None,
+    max_workers: int | None = None,
+    page_cache: PageCache | None = None,
+    lazy: bool = False,
+) -> Iterator[Paper | LazyPaper]:
+    """
+    Loads the papers from the paths of their PDFs and yields them one by one.
+    The PDFs are parsed in a process pool while the info of the
+    already parsed papers is extracted. Lazy papers are yielded with
+    their parsed pages still loaded, so they are not parsed again, and
+    the consumer releases them once it is done with the pages.
+
+    Args:
+        llm: The language model.
+        paths: The paths to the PDFs.
+        artifact_store: The store consulted for the info of already loaded papers.
+        max_workers: The number of processes parsing the PDFs, the number of CPUs by default.
+        page_cache: The cache of parsed pages, if any.
+        lazy: Whether to yield lazy papers whose pages can be released and loaded again.
+
+    Returns:
+        (Iterator[Paper | LazyPaper]): The papers.
+    """
+    pruner = PagePruner()
+    paper_info_extractor = PaperInfoExtractor(llm=llm, artifact_store=artifact_store)
+
+    for parsed in parse_pdfs(
+        paths,
+        max_workers=max_workers,
+        page_cache=page_cache,
+    ):
+        if parsed.error is not None:
+            print(f"Error parsing {parsed.path}: {parsed.error}")
+            continue
+
+        pages = pruner(parsed.pages)
+        if not lazy:
+            yield paper_from_pages(
+                paper_info_extractor=paper_info_extractor,
+                path=parsed.path,
+                pages=pages,
             )
-            papers.append(paper)
+            continue
+
+        yield load_lazy_paper(
+            paper_path=parsed.path,
+            url=str(parsed.path),
+            pruner=pruner,
+            page_cache=page_cache,
+            pages=pages,
+            **paper_info_extractor.extract_info(pages),
+        )
 
-    return papers
+    print(pruner.report())
+    print(paper_info_extractor.json_parser.report("Paper info"))
+    if page_cache is not None:
+        print(page_cache.report())
 
 
-def load_paper_from_path(llm: BaseChatModel, path: Path) -> Paper:
+def load_paper_from_path(
+    llm: BaseChatModel,
+    path: Path,
+    pruner: PagePruner | None = None,
+    artifact_store: ArtifactStore | None = None,
+    page_cache: PageCache | None = None,
+) -> Paper:
     """
     Loads the paper from the path.
 
     Args:
         llm: The language model.
         path: The path to the paper.
+        pruner: The pruner dropping reference and boilerplate pages.
+        artifact_store: The store consulted for the info of already loaded papers.
+        page_cache: The cache of parsed pages, if any.
 
     Returns:
         (Paper): The paper.
     """
-    paper_info_extractor = PaperInfoExtractor(llm=llm)
-    pdf_loader = PyPDFLoader(str(path))
-    pages = pdf_loader.load()
+    if pruner is None:
+        pruner = PagePruner()
 
+    paper_info_extractor = PaperInfoExtractor(llm=llm, artifact_store=artifact_store)
+    if page_cache is not None:
+        pages = pruner(page_cache.load(path))
+    else:
+        pages = pruner(PyPDFLoader(str(path)).load())
+
+    return paper_from_pages(
+        paper_info_extractor=paper_info_extractor,
+        path=path,
+        pages=pages,
+    )
+
+
+def paper_from_pages(
+    paper_info_extractor: PaperInfoExtractor,
+    path: Path,
+    pages: list[Document],
+) -> Paper:
+    """
+    Makes the paper from its parsed pages.
+
+    Args:
+        paper_info_extractor: The extractor of the paper info.
+        path: The path to the paper.
+        pages: The parsed pages of the paper.
+
+    Returns:
+        (Paper): The paper.
+    """
     info = paper_info_extractor.extract_info(pages)
-    paper = load_paper(
+
+    return load_paper(
         paper_path=path,
         url=str(path),
+        pages=pages,
         **info,
     )
-
-    return paper
@@ -1,8 +1,12 @@
 from paper_reader.prompts.system import chat_prompt
-from paper_reader.prompts.keywords import extract_keywords_prompt
+from paper_reader.prompts.keywords import extract_keywords_prompt, KEYWORDS_JSON_SCHEMA
+from paper_reader.prompts.repair import repair_json_prompt
 from paper_reader.prompts.signals import extract_theme_prompt
 from paper_reader.prompts.paper import (
     is_there_abstract_prompt,
     extract_paper_info_prompt,
     extarct_abstract_prompt,
+    extract_paper_metadata_prompt,
+    PAPER_INFO_JSON_SCHEMA,
+    PAPER_METADATA_JSON_SCHEMA,
 )
@@ -1,6 +1,11 @@
 from langchain_core.prompts import PromptTemplate
 
 
+KEYWORDS_JSON_SCHEMA = """\
+{
+    "keywords": list[str]
+}"""
+
 EXTRACT_KEY_WORDS_PROMPT_TEXT = """\
 Given the abstract and summary of a paper, extract the most important and specific technical and scientific keywords in JSON format. Focus on keywords that indicate specific technical or scientific trends, technologies, methods, or concepts.
 
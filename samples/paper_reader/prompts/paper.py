@@ -1,6 +1,21 @@
 from langchain_core.prompts import PromptTemplate
 
 
+PAPER_INFO_JSON_SCHEMA = """\
+{
+    "title": str,
+    "authors": list[str],
+    "year": int,
+}"""
+
+PAPER_METADATA_JSON_SCHEMA = """\
+{
+    "title": str,
+    "authors": list[str],
+    "year": int,
+    "abstract": str | null,
+}"""
+
 IS_THERE_ABSTRACT_PROMPT_TEXT = """\
 Given the following text check if there is an article abstract or summary in it.
 If there is an abstract return true else return false.
@@ -39,6 +54,25 @@ Only output the abstarct in pure string format.
 DO NOT output any other text like "Here is the abstract".
 """
 
+EXTRACT_PAPER_METADATA_PROMPT_TEXT = """\
+Given the first pages of a paper extract its information and abstract in JSON format in the following schema:
+{{
+    "title": str,
+    "authors": list[str],
+    "year": int,
+    "abstract": str | null,
+}}
+
+Copy the abstract as it is written in the paper.
+If the pages have no abstract put `null` as the abstract.
+If any of the other information is missing just put `null` in the json.
+
+Paper First Pages:
+{pages}
+
+Output the JSON data as a plain text string with no additional formatting, no code blocks, no markdown, and no additional text.
+"""
+
 is_there_abstract_prompt = PromptTemplate.from_template(
     IS_THERE_ABSTRACT_PROMPT_TEXT,
 )
@@ -50,3 +84,7 @@ extract_paper_info_prompt = PromptTemplate.from_template(
 extarct_abstract_prompt = PromptTemplate.from_template(
     EXTRACT_ABSTRACT_PROMPT_TEXT,
 )
+
+extract_paper_metadata_prompt = PromptTemplate.from_template(
+    EXTRACT_PAPER_METADATA_PROMPT_TEXT,
+)
@@ -0,0 +1,19 @@
+from langchain_core.prompts import PromptTemplate
+
+
+REPAIR_JSON_PROMPT_TEXT = """\
+The following text was meant to be JSON data in the following schema:
+{schema}
+
+Fix the text so that it is valid JSON data in this schema.
+Keep all the values that are present and do not add new ones.
+
+Text:
+{text}
+
+Output the JSON data as a plain text string with no additional formatting, no code blocks, no markdown, and no additional text.
+"""
+
+repair_json_prompt = PromptTemplate.from_template(
+    REPAIR_JSON_PROMPT_TEXT,
+)
@@ -2,12 +2,25 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.output_parsers.string import StrOutputParser
 
 from paper_reader.prompts import extract_theme_prompt
+from paper_reader.llm import without_cache
 
 
 class ThemeExtractor:
-    def __init__(self, llm: BaseChatModel) -> None:
+    def __init__(self, llm: BaseChatModel, use_cache: bool = True) -> None:
+        """
+        Initializes the theme extractor.
+
+        Args:
+            llm: The LLM to use.
+            use_cache: Whether the chain may use the LLM response cache.
+
+        Returns:
+            None
+        """
         self.llm = llm
-        self.extarct_theme_chain = extract_theme_prompt | self.llm | StrOutputParser()
+
+        chain_llm = self.llm if use_cache else without_cache(self.llm)
+        self.extarct_theme_chain = extract_theme_prompt | chain_llm | StrOutputParser()
 
     def __call__(self, keywords: list[str]) -> str:
         """
@@ -1,4 +1,7 @@
-from paper_reader.summarize.map_reduce_summarizer import MapReduceSummarizer
+from paper_reader.summarize.map_reduce_summarizer import (
+    MapReduceSummarizer,
+    SummaryEvent,
+)
 
 
-__all__ = ["MapReduceSummarizer"]
+__all__ = ["MapReduceSummarizer", "SummaryEvent"]
@@ -1,17 +1,70 @@
+from typing import NamedTuple
+from collections.abc import Callable, Iterator
+
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.output_parsers.string import StrOutputParser
 from langchain_core.documents.base import Document
 
-from paper_reader.paper import Paper
+from paper_reader.paper import Paper, PaperChunks
+from paper_reader.artifacts import ArtifactStore, artifact_version
+from paper_reader.llm import estimate_tokens, without_cache
 from paper_reader.prompts.summarize import map_summarize_prompt, reduce_summarize_prompt
 
 
+class SummaryEvent(NamedTuple):
+    kind: str
+    content: str
+    completed: int
+    total: int
+
+
 class MapReduceSummarizer:
-    def __init__(self, llm: BaseChatModel) -> None:
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        max_concurrency: int = 4,
+        token_max: int = 3000,
+        max_collapse_depth: int = 4,
+        context_window: int | None = None,
+        fill_ratio: float = 0.5,
+        overlap_ratio: float = 0.03,
+        tokenizer: Callable[[str], int] | None = None,
+        artifact_store: ArtifactStore | None = None,
+        use_cache: bool = True,
+    ) -> None:
+        """
+        Initializes the map reduce summarizer.
+
+        Args:
+            llm: The LLM to use.
+            max_concurrency: The maximum number of chunks summarized at the same time.
+            token_max: The maximum number of summary tokens passed to one reduce call.
+            max_collapse_depth: The maximum number of collapse levels before the final reduce.
+            context_window: The context window of the LLM in tokens.
+                If given, chunks are sized in tokens to fill `fill_ratio` of it.
+            fill_ratio: The share of the context window a map call should fill.
+            overlap_ratio: The share of a token-sized chunk repeated at the start of the next one.
+            tokenizer: The function counting tokens. By default tokens are estimated
+                from the text length, which needs no tokenizer download.
+            artifact_store: The store consulted for summaries of already summarized papers.
+            use_cache: Whether the chains may use the LLM response cache.
+
+        Returns:
+            None
+        """
         self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.token_max = token_max
+        self.max_collapse_depth = max_collapse_depth
+        self.context_window = context_window
+        self.fill_ratio = fill_ratio
+        self.overlap_ratio = overlap_ratio
+        self.tokenizer = tokenizer or estimate_tokens
+        self.artifact_store = artifact_store
 
-        self.map_chain = map_summarize_prompt | self.llm | StrOutputParser()
-        self.reduce_chain = reduce_summarize_prompt | self.llm | StrOutputParser()
+        chain_llm = self.llm if use_cache else without_cache(self.llm)
+        self.map_chain = map_summarize_prompt | chain_llm | StrOutputParser()
+        self.reduce_chain = reduce_summarize_prompt | chain_llm | StrOutputParser()
 
     def __call__(
         self,
@@ -23,20 +76,346 @@ class MapReduceSummarizer:
 
         Args:
             paper: The paper to summarize.
-            chunk_size: The size of the chunk.
+            chunk_size: The size of the chunk in characters, unused if `context_window` is set.
+
+        Returns:
+            (str): The summary.
+        """
+        summary = self.cached_summary(paper, chunk_size)
+        if summary is not None:
+            return summary
+
+        summaries = self.summarize_chunks(self.split_paper(paper, chunk_size))
+        summaries = self.collapse_summaries(summaries)
+        summary = self.reduce_chain.invoke(
+            {
+                "summaries": summaries,
+            }
+        )
+        self.store_summary(paper, chunk_size, summary)
+
+        return summary
+
+    async def acall(
+        self,
+        paper: Paper,
+        chunk_size: int = 6000,
+    ) -> str:
+        """
+        Summarizes the paper asynchronously.
+
+        Args:
+            paper: The paper to summarize.
+            chunk_size: The size of the chunk in characters, unused if `context_window` is set.
 
         Returns:
             (str): The summary.
         """
-        summaries = [
-            self.summarize_chunk(chunk) for chunk in paper.split(chunk_size=chunk_size)
-        ]
+        summary = self.cached_summary(paper, chunk_size)
+        if summary is not None:
+            return summary
 
-        return self.reduce_chain.invoke(
+        summaries = await self.asummarize_chunks(
+            self.split_paper(paper, chunk_size)
+        )
+        summaries = await self.acollapse_summaries(summaries)
+        summary = await self.reduce_chain.ainvoke(
             {
                 "summaries": summaries,
             }
         )
+        self.store_summary(paper, chunk_size, summary)
+
+        return summary
+
+    def stream(
+        self,
+        paper: Paper,
+        chunk_size: int = 6000,
+    ) -> Iterator[SummaryEvent]:
+        """
+        Summarizes the paper and yields events while it progresses.
+        A "map" event is yielded for every summarized chunk as soon as it completes,
+        then "reduce" events carry the tokens of the final summary.
+
+        Args:
+            paper: The paper to summarize.
+            chunk_size: The size of the chunk in characters, unused if `context_window` is set.
+
+        Returns:
+            (Iterator[SummaryEvent]): The summary events.
+        """
+        summary = self.cached_summary(paper, chunk_size)
+        if summary is not None:
+            yield SummaryEvent(kind="reduce", content=summary, completed=0, total=0)
+            return
+
+        chunks = self.split_paper(paper, chunk_size)
+        summaries = [""] * len(chunks)
+        completed = 0
+        for idx, summary in self.map_chain.batch_as_completed(
+            [{"chunk": text} for text in chunks.iter_texts()],
+            config={"max_concurrency": self.max_concurrency},
+        ):
+            summaries[idx] = summary
+            completed += 1
+            yield SummaryEvent(
+                kind="map",
+                content=summary,
+                completed=completed,
+                total=len(chunks),
+            )
+
+        summaries = self.collapse_summaries(summaries)
+        tokens = []
+        for token in self.reduce_chain.stream({"summaries": summaries}):
+            tokens.append(token)
+            yield SummaryEvent(
+                kind="reduce",
+                content=token,
+                completed=completed,
+                total=len(chunks),
+            )
+
+        self.store_summary(paper, chunk_size, "".join(tokens))
+
+    def cached_summary(self, paper: Paper, chunk_size: int) -> str | None:
+        """
+        Returns the stored summary of the paper.
+
+        Args:
+            paper: The paper.
+            chunk_size: The size of the chunk in characters.
+
+        Returns:
+            (str | None): The summary or None if there is no store or no stored summary.
+        """
+        if self.artifact_store is None:
+            return None
+
+        return self.artifact_store.get(
+            paper.pages,
+            "summary",
+            self.summary_version(chunk_size),
+        )
+
+    def store_summary(self, paper: Paper, chunk_size: int, summary: str) -> None:
+        """
+        Stores the summary of the paper if there is a store.
+
+        Args:
+            paper: The paper.
+            chunk_size: The size of the chunk in characters.
+            summary: The summary.
+
+        Returns:
+            None
+        """
+        if self.artifact_store is None:
+            return
+
+        self.artifact_store.put(
+            paper.pages,
+            "summary",
+            self.summary_version(chunk_size),
+            summary,
+        )
+
+    def summary_version(self, chunk_size: int) -> str:
+        """
+        Returns the version of the summaries made with the current settings.
+
+        Args:
+            chunk_size: The size of the chunk in characters.
+
+        Returns:
+            (str): The version.
+        """
+        if self.context_window is None:
+            chunking = {"chunk_size": chunk_size}
+        else:
+            chunking = {"overlap_ratio": self.overlap_ratio, "across_pages": True}
+
+        return artifact_version(
+            self.llm,
+            map_summarize_prompt.template,
+            reduce_summarize_prompt.template,
+            context_window=self.context_window,
+            fill_ratio=self.fill_ratio,
+            token_max=self.token_max,
+            **chunking,
+        )
+
+    def split_paper(self, paper: Paper, chunk_size: int) -> PaperChunks:
+        """
+        Splits the paper into map chunks.
+        When the context window is known, chunks are sized in tokens and
+        neighbouring pages are packed together, so a larger window takes
+        fewer map calls. Otherwise chunks are sized in characters per page.
+
+        Args:
+            paper: The paper to split.
+            chunk_size: The size of the chunk in characters.
+
+        Returns:
+            (PaperChunks): The chunks.
+        """
+        if self.context_window is None:
+            return paper.chunks(chunk_size=chunk_size)
+
+        token_chunk_size = self.token_chunk_size()
+        return paper.chunks(
+            chunk_size=token_chunk_size,
+            chunk_overlap=int(token_chunk_size * self.overlap_ratio),
+            length_function=self.count_tokens,
+            across_pages=True,
+        )
+
+    def token_chunk_size(self) -> int:
+        """
+        Returns the chunk size in tokens that fills the target share of the
+        context window once the map prompt is added.
+
+        Args:
+            None
+
+        Returns:
+            (int): The chunk size in tokens.
+        """
+        if self.context_window is None:
+            raise ValueError("The context window is not set.")
+
+        prompt_tokens = self.count_tokens(map_summarize_prompt.template)
+        return max(int(self.context_window * self.fill_ratio) - prompt_tokens, 1)
+
+    def summarize_chunks(self, chunks: PaperChunks) -> list[str]:
+        """
+        Summarizes the chunks concurrently.
+
+        Args:
+            chunks: The chunks to summarize.
+
+        Returns:
+            (list[str]): The summaries in the same order as the chunks.
+        """
+        return self.map_chain.batch(
+            [{"chunk": text} for text in chunks.iter_texts()],
+            config={"max_concurrency": self.max_concurrency},
+        )
+
+    async def asummarize_chunks(self, chunks: PaperChunks) -> list[str]:
+        """
+        Summarizes the chunks concurrently and asynchronously.
+
+        Args:
+            chunks: The chunks to summarize.
+
+        Returns:
+            (list[str]): The summaries in the same order as the chunks.
+        """
+        return await self.map_chain.abatch(
+            [{"chunk": text} for text in chunks.iter_texts()],
+            config={"max_concurrency": self.max_concurrency},
+        )
+
+    def collapse_summaries(self, summaries: list[str]) -> list[str]:
+        """
+        Reduces the summaries level by level until they fit in one reduce call.
+        The groups of each level are reduced concurrently.
+
+        Args:
+            summaries: The summaries to collapse.
+
+        Returns:
+            (list[str]): The collapsed summaries.
+        """
+        for _ in range(self.max_collapse_depth):
+            if self.fits_in_reduce(summaries):
+                break
+
+            summaries = self.reduce_chain.batch(
+                [{"summaries": group} for group in self.group_summaries(summaries)],
+                config={"max_concurrency": self.max_concurrency},
+            )
+
+        return summaries
+
+    async def acollapse_summaries(self, summaries: list[str]) -> list[str]:
+        """
+        Reduces the summaries level by level asynchronously until they fit in one reduce call.
+
+        Args:
+            summaries: The summaries to collapse.
+
+        Returns:
+            (list[str]): The collapsed summaries.
+        """
+        for _ in range(self.max_collapse_depth):
+            if self.fits_in_reduce(summaries):
+                break
+
+            summaries = await self.reduce_chain.abatch(
+                [{"summaries": group} for group in self.group_summaries(summaries)],
+                config={"max_concurrency": self.max_concurrency},
+            )
+
+        return summaries
+
+    def fits_in_reduce(self, summaries: list[str]) -> bool:
+        """
+        Checks whether the summaries fit in a single reduce call.
+
+        Args:
+            summaries: The summaries to check.
+
+        Returns:
+            (bool): True if the summaries fit in the token budget.
+        """
+        if len(summaries) <= 1:
+            return True
+
+        return sum(self.count_tokens(summary) for summary in summaries) <= self.token_max
+
+    def group_summaries(self, summaries: list[str]) -> list[list[str]]:
+        """
+        Groups consecutive summaries into batches that fit in the token budget.
+        A summary larger than the budget gets a batch of its own.
+
+        Args:
+            summaries: The summaries to group.
+
+        Returns:
+            (list[list[str]]): The groups of summaries.
+        """
+        groups: list[list[str]] = []
+        group: list[str] = []
+        group_tokens = 0
+        for summary in summaries:
+            tokens = self.count_tokens(summary)
+            if group and group_tokens + tokens > self.token_max:
+                groups.append(group)
+                group = []
+                group_tokens = 0
+
+            group.append(summary)
+            group_tokens += tokens
+
+        if group:
+            groups.append(group)
+
+        return groups
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Counts the tokens of the text.
+
+        Args:
+            text: The text to count.
+
+        Returns:
+            (int): The number of tokens.
+        """
+        return self.tokenizer(text)
 
     def summarize_chunk(self, chunk: Document) -> str:
         """
@@ -53,3 +432,4 @@ class MapReduceSummarizer:
                 "chunk": chunk.page_content,
             }
         )
+
@@ -0,0 +1,55 @@
+import pytest
+
+from langchain_core.documents.base import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from paper_reader.paper.chunks import chunk_pages, join_pages
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+PAGES = [
+    Document(
+        page_content=" ".join(
+            f"word{i % 37} sentence{i}." for i in range(page * 200, page * 200 + 400)
+        ),
+        metadata={"source": "paper.pdf", "page": page},
+    )
+    for page in range(3)
+]
+
+
+@pytest.mark.parametrize(
+    "chunk_size, chunk_overlap, length_function",
+    [(500, 50, len), (60, 10, count_words)],
+)
+def test_chunk_texts_match_splitter(chunk_size, chunk_overlap, length_function):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=length_function,
+    )
+
+    chunks = chunk_pages("paper", PAGES, splitter)
+
+    expected = [chunk for page in PAGES for chunk in splitter.split_text(page.page_content)]
+    assert list(chunks.iter_texts()) == expected
+    assert all(view.start >= 0 for view in chunks.views)
+
+
+def test_joined_pages_pack_neighbouring_pages():
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=2000,
+        chunk_overlap=0,
+        length_function=count_words,
+    )
+
+    per_page = chunk_pages("paper", PAGES, splitter)
+    joined = chunk_pages("paper", join_pages(PAGES), splitter)
+
+    assert len(per_page) == len(PAGES)
+    assert len(joined) < len(per_page)
+    assert joined.metadata["page_starts"] == [0, 7781, 15674]
+    assert list(joined.iter_texts()) == splitter.split_text(joined.texts[0])